@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import warnings
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Score columns written by prepare_results_frame (overall_bias is the row mean).
+BIAS_COLS = ["subject_bias", "framing_bias", "treatment_bias", "guests_bias", "overall_bias"]
+
+
+# ---------- Reshaping ----------
+
+def score_cube(df: pd.DataFrame, value: str = "overall_bias") -> Tuple[np.ndarray, pd.Index, pd.Index, pd.Index]:
+    """
+    Scatter the long results frame into a dense (model, article, run) array.
+    Missing scores (failed calls, unparsed JSON) stay NaN. Duplicate
+    (model, article, run) rows are an error rather than last-write-wins.
+    """
+    keys = ["model", "article_id", "run"]
+    dup = df.assign(article_id=df["article_id"].astype(str)).duplicated(keys, keep=False)
+    if dup.any():
+        examples = df.loc[dup, keys].drop_duplicates().head(5).to_dict("records")
+        raise ValueError(f"{int(dup.sum())} duplicate (model, article_id, run) rows, e.g. {examples}")
+
+    models = pd.Index(sorted(df["model"].unique()), name="model")
+    articles = pd.Index(sorted(df["article_id"].astype(str).unique()), name="article_id")
+    runs = pd.Index(sorted(df["run"].unique()), name="run")
+
+    cube = np.full((len(models), len(articles), len(runs)), np.nan)
+    mi = models.get_indexer(df["model"])
+    ai = articles.get_indexer(df["article_id"].astype(str))
+    ri = runs.get_indexer(df["run"])
+    cube[mi, ai, ri] = pd.to_numeric(df[value], errors="coerce").to_numpy(dtype=float)
+    return cube, models, articles, runs
+
+
+# ---------- Reliability statistics ----------
+# All functions below take x with shape (..., units, coders) and reduce the
+# last two axes, so any number of models / bootstrap replicates is handled
+# in a single array expression. Both statistics are functions of per-unit
+# sums (_*_unit_sums), which is what lets bootstrap_ci resample units
+# without copying the coder axis.
+
+def _alpha_unit_sums(x: np.ndarray) -> np.ndarray:
+    """(..., units, coders) -> (..., units, 4): pairable count, sum x, sum x^2, within-unit disagreement."""
+    valid = ~np.isnan(x)
+    m_u = valid.sum(axis=-1)
+    pairable = m_u >= 2
+    xv = np.where(valid & pairable[..., None], x, 0.0)
+    cnt = np.where(pairable, m_u, 0)
+
+    s1 = xv.sum(axis=-1)
+    s2 = (xv ** 2).sum(axis=-1)
+    # sum over ordered pairs (i != j) of (x_i - x_j)^2 = 2 * (m * sum x^2 - (sum x)^2)
+    within = 2.0 * (cnt * s2 - s1 ** 2) / np.where(pairable, cnt - 1, 1)
+    return np.stack([cnt, s1, s2, within], axis=-1)
+
+
+def _alpha_from_sums(t: np.ndarray, k: int) -> np.ndarray:
+    n, S1, S2, within = np.moveaxis(t, -1, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d_o = within / n
+        d_e = 2.0 * (n * S2 - S1 ** 2) / (n * (n - 1))
+        return 1.0 - d_o / d_e
+
+
+def krippendorff_alpha_interval(x: np.ndarray) -> np.ndarray:
+    """Krippendorff's alpha (interval metric); NaN marks a missing value."""
+    return _alpha_from_sums(_alpha_unit_sums(x).sum(axis=-2), x.shape[-1])
+
+
+def _icc_unit_sums(x: np.ndarray) -> np.ndarray:
+    """(..., units, coders) -> (..., units, 4): complete flag, row mean, its square, within-row sum of squares."""
+    complete = ~np.isnan(x).any(axis=-1)
+    xc = np.where(complete[..., None], x, 0.0)
+    row_mean = xc.mean(axis=-1)
+    ss_within = ((xc - row_mean[..., None]) ** 2).sum(axis=-1)
+    c = complete.astype(float)
+    return np.stack([c, c * row_mean, c * row_mean ** 2, c * ss_within], axis=-1)
+
+
+def _icc_from_sums(t: np.ndarray, k: int) -> np.ndarray:
+    n, R1, R2, ssw = np.moveaxis(t, -1, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        msb = k * (R2 - R1 ** 2 / n) / (n - 1)
+        msw = ssw / (n * (k - 1))
+        return (msb - msw) / (msb + (k - 1) * msw)
+
+
+def icc_oneway(x: np.ndarray) -> np.ndarray:
+    """
+    ICC(1,1): one-way random effects, single rater.
+    Runs are exchangeable, so there is no rater effect to model.
+    Only units scored by every coder are used.
+    """
+    return _icc_from_sums(_icc_unit_sums(x).sum(axis=-2), x.shape[-1])
+
+
+# statistic -> (per-unit sums, statistic from summed units)
+_UNIT_SUMS: Dict[Callable, Tuple[Callable, Callable]] = {
+    krippendorff_alpha_interval: (_alpha_unit_sums, _alpha_from_sums),
+    icc_oneway: (_icc_unit_sums, _icc_from_sums),
+}
+
+
+# ---------- Bootstrap ----------
+
+# bytes a bootstrap batch may allocate; batch_size is derived from it
+BOOTSTRAP_BATCH_BYTES = 64 * 2**20
+
+
+def bootstrap_ci(
+    x: np.ndarray,
+    stat: Callable[[np.ndarray], np.ndarray],
+    n_boot: int = 1000,
+    ci: float = 0.95,
+    seed: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    max_bytes: int = BOOTSTRAP_BATCH_BYTES,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Percentile CI from resampling units (axis -2) with replacement.
+
+    For krippendorff_alpha_interval and icc_oneway the per-unit sums are
+    computed once and a batch of b replicates is a multinomial count matrix
+    W (b, units): W @ sums gives every replicate's totals without copying
+    the coder axis. Any other stat falls back to gathering x[..., idx, :].
+    batch_size defaults to as many replicates as fit in max_bytes.
+    """
+    rng = np.random.default_rng(seed)
+    n_units, k = x.shape[-2], x.shape[-1]
+    lead = int(np.prod(x.shape[:-2], dtype=np.int64))
+    decomposed = _UNIT_SUMS.get(stat)
+
+    if decomposed is not None:
+        unit_sums, from_sums = decomposed
+        sums = unit_sums(x)  # (..., units, 4)
+        # W as int64 and float64, plus (..., b, 4) totals
+        per_rep = 16 * n_units + 8 * lead * sums.shape[-1]
+    else:
+        # gathered copy plus the temporaries a stat makes of it
+        per_rep = 8 * n_units * (1 + 4 * lead * k)
+    if batch_size is None:
+        batch_size = max(1, min(n_boot, max_bytes // per_rep))
+
+    reps = []
+    for start in range(0, n_boot, batch_size):
+        b = min(batch_size, n_boot - start)
+        if decomposed is not None:
+            w = rng.multinomial(n_units, np.full(n_units, 1.0 / n_units), size=b).astype(float)
+            reps.append(from_sums(w @ sums, k))  # (b, units) @ (..., units, 4) -> (..., b)
+        else:
+            idx = rng.integers(0, n_units, size=(b, n_units))
+            reps.append(stat(x[..., idx, :]))  # (..., b, units, coders) -> (..., b)
+    dist = np.concatenate(reps, axis=-1)
+
+    tail = (1.0 - ci) / 2.0
+    with warnings.catch_warnings():
+        # degenerate replicates (e.g. a model that never varies) are all-NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        lo, hi = np.nanpercentile(dist, [100 * tail, 100 * (1 - tail)], axis=-1)
+    return lo, hi
+
+
+# ---------- Frames ----------
+
+def run_variance(df: pd.DataFrame, value: str = "overall_bias") -> pd.DataFrame:
+    """Per (model, article) spread across runs: the hallucination signal."""
+    out = (
+        df.assign(article_id=df["article_id"].astype(str))
+        .groupby(["model", "article_id"])[value]
+        .agg(["mean", "var", "std", "min", "max", "count"])
+        .reset_index()
+    )
+    out["range"] = out["max"] - out["min"]
+    return out
+
+
+def model_reliability(
+    df: pd.DataFrame,
+    value: str = "overall_bias",
+    n_boot: int = 1000,
+    ci: float = 0.95,
+    seed: Optional[int] = None,
+) -> pd.DataFrame:
+    """Per-model agreement across runs (ICC and alpha) with bootstrap CIs."""
+    cube, models, articles, runs = score_cube(df, value)
+
+    icc = icc_oneway(cube)
+    alpha = krippendorff_alpha_interval(cube)
+    icc_lo, icc_hi = bootstrap_ci(cube, icc_oneway, n_boot=n_boot, ci=ci, seed=seed)
+    alpha_lo, alpha_hi = bootstrap_ci(cube, krippendorff_alpha_interval, n_boot=n_boot, ci=ci, seed=seed)
+
+    return pd.DataFrame({
+        "model": models,
+        "n_articles": (~np.isnan(cube)).any(axis=-1).sum(axis=-1),
+        "n_runs": len(runs),
+        "icc": icc,
+        "icc_lo": icc_lo,
+        "icc_hi": icc_hi,
+        "alpha": alpha,
+        "alpha_lo": alpha_lo,
+        "alpha_hi": alpha_hi,
+    })
+
+
+def _model_means(cube: np.ndarray) -> np.ndarray:
+    """(model, article, run) -> (model, article) mean over runs, NaN-aware."""
+    counts = (~np.isnan(cube)).sum(axis=-1)
+    sums = np.nansum(cube, axis=-1)
+    with np.errstate(invalid="ignore"):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def inter_model_agreement(
+    df: pd.DataFrame,
+    value: str = "overall_bias",
+    n_boot: int = 1000,
+    ci: float = 0.95,
+    seed: Optional[int] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Pairwise agreement between models on their run-averaged scores.
+    Returns model x model frames: alpha (+ CI bounds), Pearson r and
+    mean absolute difference. Run-averaging removes most run-to-run noise,
+    so disagreement left here is the systematic (bias) part.
+    """
+    cube, models, articles, runs = score_cube(df, value)
+    means = _model_means(cube)  # (model, article)
+
+    # upper triangle only: (pair, article, 2), every pair as a two-coder problem
+    i, j = np.triu_indices(len(models), k=1)
+    pairs = np.stack([means[i], means[j]], axis=-1)
+
+    def square(upper, diagonal):
+        out = np.full((len(models), len(models)), float(diagonal))
+        out[i, j] = out[j, i] = upper
+        return out
+
+    lo, hi = bootstrap_ci(pairs, krippendorff_alpha_interval, n_boot=n_boot, ci=ci, seed=seed)
+    alpha, alpha_lo, alpha_hi = (square(v, 1.0) for v in (krippendorff_alpha_interval(pairs), lo, hi))
+    with np.errstate(invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # pairs with no common article
+        mad = square(np.nanmean(np.abs(pairs[..., 0] - pairs[..., 1]), axis=-1), 0.0)
+
+    def frame(arr):
+        return pd.DataFrame(arr, index=models, columns=models)
+
+    return {
+        "alpha": frame(alpha),
+        "alpha_lo": frame(alpha_lo),
+        "alpha_hi": frame(alpha_hi),
+        "pearson": pd.DataFrame(means.T, columns=models).corr(),
+        "mean_abs_diff": frame(mad),
+    }
+
+
+def agreement_report(
+    df: pd.DataFrame,
+    value: str = "overall_bias",
+    n_boot: int = 1000,
+    ci: float = 0.95,
+    seed: Optional[int] = 0,
+) -> Dict[str, pd.DataFrame]:
+    """Everything needed to separate run noise from systematic lean."""
+    report = {
+        "run_variance": run_variance(df, value),
+        "model_reliability": model_reliability(df, value, n_boot=n_boot, ci=ci, seed=seed),
+    }
+    for name, frame in inter_model_agreement(df, value, n_boot=n_boot, ci=ci, seed=seed).items():
+        report[f"inter_model_{name}"] = frame
+    return report
@@ -0,0 +1,167 @@
+"""
+Micro-benchmarks for the extraction and post-processing hot paths.
+
+Runs every html_parse extractor (and BeautifulSoup construction itself)
+against the fixture pages in input_files/fixtures/, then the
+post_processing steps on a frame of N copies of the parsed fixtures,
+and finally every JSON I/O path once per installed serialization backend.
+No network access needed.
+
+    python app/benchmarks.py [--repeat 200] [--rows 5000] [fixture.html ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import timeit
+from dataclasses import asdict
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+import html_parse as hp
+import serialization
+from post_processing import clean_fields, create_wordcounts
+from records import ModelScores
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "input_files" / "fixtures"
+
+
+def extractor_cases(html: str) -> Dict[str, Callable[[], object]]:
+    soup = BeautifulSoup(html, "html.parser")
+    jsonld = hp.extract_jsonld_newsarticle(soup)
+    return {
+        "BeautifulSoup(html.parser)": lambda: BeautifulSoup(html, "html.parser"),
+        "extract_jsonld_newsarticle": lambda: hp.extract_jsonld_newsarticle(soup),
+        "extract_title": lambda: hp.extract_title(soup),
+        "extract_lead": lambda: hp.extract_lead(soup),
+        "extract_body": lambda: hp.extract_body(soup.body),
+        "extract_sources": lambda: hp.extract_sources(soup.body),
+        "extract_credits": lambda: hp.extract_credits(soup.body),
+        "extract_date_published": lambda: hp.extract_date_published(soup),
+        "extract_description": lambda: hp.extract_description(soup),
+        "extract_keywords_from_jsonld": lambda: hp.extract_keywords_from_jsonld(jsonld),
+        "extract_publisher_name": lambda: hp.extract_publisher_name(jsonld),
+        "extract_canonical_url": lambda: hp.extract_canonical_url(jsonld),
+        "extract_headline": lambda: hp.extract_headline(jsonld),
+        "extract_alt_headline": lambda: hp.extract_alt_headline(jsonld),
+        "extract_article_section": lambda: hp.extract_article_section(jsonld),
+        "extract_language": lambda: hp.extract_language(jsonld),
+    }
+
+
+def time_case(fn: Callable[[], object], repeat: int) -> float:
+    """Best-of-5 mean seconds per call."""
+    return min(timeit.repeat(fn, number=repeat, repeat=5)) / repeat
+
+
+def bench_extractors(paths: List[Path], repeat: int) -> pd.DataFrame:
+    rows = []
+    for p in paths:
+        html = p.read_text(encoding="utf-8")
+        for name, fn in extractor_cases(html).items():
+            rows.append({"fixture": p.name, "case": name, "us_per_call": time_case(fn, repeat) * 1e6})
+    df = pd.DataFrame(rows)
+    df["share"] = df["us_per_call"] / df.groupby("fixture")["us_per_call"].transform("sum")
+    return df.sort_values(["fixture", "us_per_call"], ascending=[True, False])
+
+
+def fixture_frame(paths: List[Path], rows: int) -> pd.DataFrame:
+    records = []
+    for p in paths:
+        soup = BeautifulSoup(p.read_text(encoding="utf-8"), "html.parser")
+        jsonld = hp.extract_jsonld_newsarticle(soup)
+        records.append(asdict(hp.RTSArticle(
+            title=hp.extract_title(soup),
+            lead=hp.extract_lead(soup),
+            body=hp.extract_body(soup.body),
+            sources=hp.extract_sources(soup.body),
+            credit=hp.extract_credits(soup.body),
+            date_published=hp.extract_date_published(soup),
+            date_accessed="2026-01-15 09:00:00",
+            keywords=hp.extract_keywords_from_jsonld(jsonld),
+            publisher_name=hp.extract_publisher_name(jsonld),
+            in_language=hp.extract_language(jsonld),
+            article_section=hp.extract_article_section(jsonld),
+            headline=hp.extract_headline(jsonld),
+            alternative_headline=hp.extract_alt_headline(jsonld),
+            canonical_url=hp.extract_canonical_url(jsonld),
+            description=hp.extract_description(soup),
+        )))
+    df = pd.DataFrame.from_records(records * (rows // len(records) + 1)).head(rows)
+    df["article_id"] = [str(i) for i in range(len(df))]
+    return df
+
+
+def bench_post_processing(paths: List[Path], rows: int) -> pd.DataFrame:
+    raw = fixture_frame(paths, rows)
+    cleaned = clean_fields(raw)
+    cases = {
+        "clean_fields": lambda: clean_fields(raw),
+        "create_wordcounts": lambda: create_wordcounts(cleaned),
+    }
+    return pd.DataFrame([
+        {"case": name, "rows": rows, "ms_per_call": time_case(fn, 3) * 1e3}
+        for name, fn in cases.items()
+    ])
+
+
+def bench_serialization(paths: List[Path], repeat: int) -> pd.DataFrame:
+    """Same payloads through each backend: webdata, model results, Ollama replies."""
+    article = fixture_frame(paths, 1).drop(columns="article_id").to_dict("records")[0]
+    scores = {
+        "subject_bias": 0.1, "framing_bias": -0.2, "treatment_bias": 0.0, "guests_bias": 0.3,
+        "confidence": 0.7, "comment": "Le texte reste factuel. Les voix citées sont équilibrées.",
+    }
+    ollama_reply = serialization.dumps({
+        "model": "llama3.2:latest", "created_at": "2026-01-15T09:00:00Z",
+        "response": serialization.dumps(scores).decode("utf-8"), "done": True,
+        "context": list(range(2048)), "prompt_eval_count": 812, "eval_count": 96,
+    })
+
+    rows = []
+    active = serialization.BACKEND, serialization.TYPED_BACKEND
+    with tempfile.TemporaryDirectory() as tmp:
+        art_path, score_path = Path(tmp) / "article.json", Path(tmp) / "score.json"
+        for name, backend in serialization.available_backends().items():
+            serialization.BACKEND = serialization.TYPED_BACKEND = backend
+            serialization.write_json(art_path, article)
+            serialization.write_json(score_path, scores)
+            cases = {
+                "save_data (write article)": lambda: serialization.write_json(art_path, article),
+                "load_article_body (read article)": lambda: serialization.read_json(art_path),
+                "load_article (typed RTSArticle)": lambda: serialization.read_json_as(art_path, hp.RTSArticle),
+                "save_model_results (write scores)": lambda: serialization.write_json(score_path, scores),
+                "prepare_results_frame (read scores)": lambda: serialization.read_json(score_path),
+                "prepare_results_frame (typed ModelScores)": lambda: serialization.read_json_as(score_path, ModelScores),
+                "call_ollama (decode reply)": lambda: serialization.loads(ollama_reply),
+            }
+            for case, fn in cases.items():
+                rows.append({"backend": name, "case": case, "us_per_call": time_case(fn, repeat) * 1e6})
+    serialization.BACKEND, serialization.TYPED_BACKEND = active
+
+    df = pd.DataFrame(rows)
+    return df.pivot(index="case", columns="backend", values="us_per_call")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("fixtures", nargs="*", type=Path)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+
+    paths = args.fixtures or sorted(FIXTURE_DIR.glob("*.html"))
+    with pd.option_context("display.width", 160, "display.max_rows", 200):
+        print(bench_extractors(paths, args.repeat).to_string(index=False))
+        print()
+        print(bench_post_processing(paths, args.rows).to_string(index=False))
+        print()
+        print(bench_serialization(paths, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
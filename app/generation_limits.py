@@ -0,0 +1,143 @@
+"""
+Per-model generation limits learned from what each model actually produces.
+
+Every Ollama call appends one line to final/generation_stats.jsonl with the
+output token count (eval_count), the prompt size, the num_predict / num_ctx
+in effect and whether generation stopped on the length limit (done_reason
+"length"), which is what sends parse_json_from_model into its repair path.
+The prompt size includes any prefix Ollama served from its cache (the raw
+prompt_eval_count is logged next to it); ctx_exceeded marks calls whose
+prompt plus output did not fit num_ctx, which Ollama truncates silently.
+
+update_generation_limits turns that log into final/generation_limits.json,
+using only each model's calls made with the num_predict currently in effect
+(that of its latest call):
+    num_predict = p95 of output tokens * 1.25 (+16), raised by 50% over the
+                  limit in use when more than 5% of calls were truncated
+                  (truncated counts are capped, so p95 underestimates them)
+    num_ctx     = p99 prompt tokens + num_predict, rounded up to 512, never
+                  below the configured Settings.ollama_options num_ctx
+                  (an explicit Settings.model_options num_ctx still wins)
+Calls at earlier limits are ignored: their truncations were already answered
+by the raise that produced the current limit, and counting them again would
+keep raising it. Models with fewer than min_samples calls at the current
+limit keep their previous entry. Settings.options_for merges these under any
+explicit Settings.model_options.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from serialization import dumps, loads, read_json, write_json
+
+NUM_PREDICT_RANGE = (64, 1024)
+NUM_CTX_RANGE = (1024, 8192)
+TRUNCATION_TOLERANCE = 0.05
+
+_append_lock = threading.Lock()  # streaming mode may score on several threads
+
+
+def record_generation(
+    settings,
+    model: str,
+    response: Dict[str, Any],
+    options: Dict[str, Any],
+    parse_failed: bool,
+    prompt_tokens: Optional[int] = None,
+) -> None:
+    """Append one observation; prompt_tokens is the full prompt size, cached prefix included."""
+    if prompt_tokens is None:
+        prompt_tokens = response.get("prompt_eval_count")
+    num_ctx = options.get("num_ctx")
+    obs = {
+        "ts": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+        "model": model,
+        "eval_count": response.get("eval_count"),
+        "prompt_tokens": prompt_tokens,
+        "prompt_eval_count": response.get("prompt_eval_count"),
+        "ctx_exceeded": bool(num_ctx and prompt_tokens and prompt_tokens + (response.get("eval_count") or 0) > num_ctx),
+        "done_reason": response.get("done_reason"),
+        "truncated": response.get("done_reason") == "length",
+        "parse_failed": parse_failed,
+        "num_predict": options.get("num_predict"),
+        "num_ctx": options.get("num_ctx"),
+    }
+    path = settings.generation_stats_file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _append_lock, open(path, "ab") as f:
+        f.write(dumps(obs) + b"\n")
+
+
+def load_observations(path: Path) -> pd.DataFrame:
+    path = Path(path)
+    if not path.exists():
+        return pd.DataFrame()
+    rows = [loads(line) for line in path.read_bytes().splitlines() if line.strip()]
+    return pd.DataFrame.from_records(rows)
+
+
+def _round_up(x: float, step: int) -> int:
+    return int(math.ceil(x / step) * step)
+
+
+def derive_limits(
+    obs: pd.DataFrame,
+    min_samples: int = 20,
+    num_ctx_floor: int = NUM_CTX_RANGE[0],
+) -> Dict[str, Dict[str, Any]]:
+    """model -> {num_predict, num_ctx, plus the statistics they came from}."""
+    if obs.empty:
+        return {}
+    obs = obs.dropna(subset=["eval_count"])
+    # window: calls at the num_predict of each model's latest call (log is chronological)
+    in_effect = obs["num_predict"].fillna(-1)
+    obs = obs[in_effect == in_effect.groupby(obs["model"]).transform("last")]
+    g = obs.groupby("model")
+    summary = pd.DataFrame({
+        "n": g.size(),
+        "eval_p50": g["eval_count"].quantile(0.50),
+        "eval_p95": g["eval_count"].quantile(0.95),
+        "prompt_p99": g["prompt_tokens"].quantile(0.99),
+        "truncation_rate": g["truncated"].mean(),
+        "parse_failure_rate": g["parse_failed"].mean(),
+        "num_predict_used": g["num_predict"].last(),
+    })
+
+    limits = {}
+    for model, s in summary[summary["n"] >= min_samples].iterrows():
+        num_predict = s["eval_p95"] * 1.25 + 16
+        if s["truncation_rate"] > TRUNCATION_TOLERANCE and pd.notna(s["num_predict_used"]):
+            num_predict = max(num_predict, s["num_predict_used"] * 1.5)
+        num_predict = int(min(max(math.ceil(num_predict), NUM_PREDICT_RANGE[0]), NUM_PREDICT_RANGE[1]))
+
+        prompt = s["prompt_p99"] if pd.notna(s["prompt_p99"]) else 0
+        num_ctx = min(max(_round_up(prompt + num_predict, 512), num_ctx_floor, NUM_CTX_RANGE[0]), NUM_CTX_RANGE[1])
+
+        limits[model] = {
+            "num_predict": num_predict,
+            "num_ctx": num_ctx,
+            **{k: (round(float(v), 4) if pd.notna(v) else None) for k, v in s.items()},
+        }
+    return limits
+
+
+def update_generation_limits(settings) -> Dict[str, Dict[str, Any]]:
+    path = settings.generation_limits_file
+    derived = derive_limits(
+        load_observations(settings.generation_stats_file),
+        settings.adaptive_min_samples,
+        # learned limits may raise num_ctx but not shrink the configured one
+        num_ctx_floor=settings.ollama_options.get("num_ctx", NUM_CTX_RANGE[0]),
+    )
+    # too few calls since the last change: keep the limit that is in effect
+    limits = {**(read_json(path) if path.exists() else {}), **derived}
+    if derived:
+        write_json(path, limits, pretty=True)
+    return derived
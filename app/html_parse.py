@@ -1,7 +1,8 @@
 
-import json
+import os
 import pandas as pd
-from dataclasses import dataclass, is_dataclass, asdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, asdict
 from datetime import datetime, timezone
 from typing import Optional, List, Dict, Any
 from urllib.request import urlopen, Request
@@ -11,6 +12,10 @@ from pathlib import Path
 
 from bs4 import BeautifulSoup
 
+from ingest_index import IngestIndex, normalize_url
+from profiling import profile_worker_call
+from serialization import DecodeError, loads, read_json_as, write_json
+
 
 # ---------- Dataclass (schema enforcement) ----------
 
@@ -40,30 +45,94 @@ class RTSArticle:
     credit: List[str]
 
 # prepare data
-def process_input_data(file_path):
+def read_input_urls(file_path) -> List[str]:
+    """
+    Input urls as given, deduplicated on their normalized form (first
+    occurrence wins). normalize_url is only the dedupe / index key: the
+    link itself is what gets fetched.
+    """
     with open(file_path, 'r') as f:
-        urls = f.readlines()
+        lines = f.readlines()
+    urls = []
+    seen = set()
+    for i, line in enumerate(lines):
+        line = line.strip()
+        if not line or (i == 0 and line.lower() == "url"):
+            continue  # blank line / csv header
+        key = normalize_url(line)
+        if key is None:
+            print(f"Skipping invalid URL: {line}")
+            continue
+        if key in seen:
+            continue
+        seen.add(key)
+        urls.append(line)
+    return urls
+
+
+def process_input_data(
+    file_path,
+    index: Optional[IngestIndex] = None,
+    refetch: bool = False,
+    fetch_workers: int = 1,
+    parse_workers: int = 1,
+    profile_to: Optional[Path] = None,
+):
+    """
+    Fetch on a thread pool (I/O bound) and hand the raw bytes to a process
+    pool for parsing (CPU bound, GIL-free). parse_workers=1 parses inline,
+    0 uses one process per core. With profile_to, pool workers profile their
+    parse calls into that folder (see profiling.merge_worker_profiles).
+    """
+    urls = read_input_urls(file_path)
+    if index is not None:
+        urls = [u for u in urls if index.needs_fetch(u, refetch=refetch)]
+
+    parse_pool = None
+    if parse_workers != 1:
+        parse_pool = ProcessPoolExecutor(max_workers=parse_workers or os.cpu_count())
+
+    def fetch(url):
+        return url, fetch_rts_html(url), _now_utc()
+
     articles = []
-    for url in urls:
-        # check them
-        # then call
-        try:
-            url = url.strip()
-            if not url.startswith("http"):
-                print(f"Skipping invalid URL: {url}")
-                continue
-            data = parse_html(url)
-            if is_dataclass(data):
-                data = asdict(data)
-            articles.append(data)
-        except Exception as e:
-            print(f"Error processing {url}: {e}")
+    parsing = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max(fetch_workers, 1)) as fetch_pool:
+            fetching = {fetch_pool.submit(fetch, url): url for url in urls}
+            for fut in as_completed(fetching):
+                url = fetching[fut]
+                try:
+                    _, html, accessed = fut.result()
+                    if parse_pool is None:
+                        articles.append(_parse_worker(url, html, accessed))
+                    else:
+                        job = (_parse_worker, url, html, accessed)
+                        if profile_to is not None:
+                            job = (profile_worker_call, "parse_html", profile_to, *job)
+                        parsing[parse_pool.submit(*job)] = url
+                except Exception as e:
+                    print(f"Error processing {url}: {e}")
+
+        for fut in as_completed(parsing):
+            try:
+                articles.append(fut.result())
+            except Exception as e:
+                print(f"Error processing {parsing[fut]}: {e}")
+    finally:
+        if parse_pool is not None:
+            parse_pool.shutdown()
+
+    # keep input order regardless of completion order
+    order = {u: i for i, u in enumerate(urls)}
+    articles.sort(key=lambda a: order[a["url"]])
     return articles
 
 
 # ---------- Fetch ----------
 
-def fetch_rts_soup(url: str) -> BeautifulSoup:
+def fetch_rts_html(url: str) -> bytes:
+    """Network only: raw HTML bytes, decoding and parsing happen in parse_rts_html."""
     req = Request(
         url,
         headers={
@@ -77,7 +146,12 @@ def fetch_rts_soup(url: str) -> BeautifulSoup:
         if "text/html" not in ctype:
             raise ValueError(f"Not HTML: {ctype}")
 
-        html = r.read().decode("utf-8", errors="ignore")
+        return r.read()
+
+
+def make_soup(html: bytes | str) -> BeautifulSoup:
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", errors="ignore")
 
     soup = BeautifulSoup(html, "html.parser")
     if not soup.html or not soup.body:
@@ -85,6 +159,10 @@ def fetch_rts_soup(url: str) -> BeautifulSoup:
 
     return soup
 
+
+def fetch_rts_soup(url: str) -> BeautifulSoup:
+    return make_soup(fetch_rts_html(url))
+
 def extract_jsonld_newsarticle(soup: BeautifulSoup) -> Dict[str, Any]:
     """Fail-soft: returns {} if not found or not parseable."""
     if not soup:
@@ -96,8 +174,8 @@ def extract_jsonld_newsarticle(soup: BeautifulSoup) -> Dict[str, Any]:
         if not raw:
             continue
         try:
-            data = json.loads(raw)
-        except json.JSONDecodeError:
+            data = loads(raw)
+        except DecodeError:
             continue
 
         article = _pick_newsarticle(data)
@@ -271,8 +349,9 @@ def extract_language(j: Dict[str, Any]) -> Optional[str]:
 
 # ---------- Orchestrator ----------
 
-def parse_html(url: str) -> RTSArticle:
-    soup = fetch_rts_soup(url)
+def parse_rts_html(html: bytes | str, date_accessed: Optional[str] = None) -> RTSArticle:
+    """CPU-only part of parse_html: soup building and all extractors."""
+    soup = make_soup(html)
     jsonld = extract_jsonld_newsarticle(soup)
     return RTSArticle(
         title=extract_title(soup),
@@ -281,7 +360,7 @@ def parse_html(url: str) -> RTSArticle:
         sources=extract_sources(soup.body),
         credit=extract_credits(soup.body),
         date_published=extract_date_published(soup),
-        date_accessed=datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+        date_accessed=date_accessed or _now_utc(),
         keywords=extract_keywords_from_jsonld(jsonld),
         publisher_name=extract_publisher_name(jsonld),
         in_language=extract_language(jsonld),
@@ -294,6 +373,22 @@ def parse_html(url: str) -> RTSArticle:
 
     )
 
+
+def parse_html(url: str) -> RTSArticle:
+    return parse_rts_html(fetch_rts_html(url))
+
+
+def _now_utc() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _parse_worker(url: str, html: bytes, date_accessed: str) -> Dict[str, Any]:
+    # runs in a pool process: return a plain dict, it pickles smaller and
+    # faster than the dataclass and is what save_data expects anyway
+    data = asdict(parse_rts_html(html, date_accessed))
+    data["url"] = url
+    return data
+
 # save the data
 
 def make_filename(article):
@@ -310,9 +405,22 @@ def make_filename(article):
     return f"{slug[:30]}.json"
 
 
-def save_data(articles, directory):
+def save_data(articles, directory, index: Optional[IngestIndex] = None):
+    """
+    Write one json per article. With an index, ids that collide with another
+    url are disambiguated and articles whose body hash is unchanged are skipped.
+    """
     for article in articles:
         fname = make_filename(article)
-        save_path = directory / fname
-        with open(save_path, "w", encoding="utf-8") as f:
-            json.dump(article, f, ensure_ascii=False, indent=2)
\ No newline at end of file
+        if index is not None and article.get("url"):
+            article_id = index.assign_id(article["url"], Path(fname).stem)
+            article_id, changed = index.record_article(article["url"], article_id, article.get("body"))
+            if not changed:
+                continue
+            fname = f"{article_id}.json"
+        write_json(directory / fname, article)
+
+
+def load_article(path) -> RTSArticle:
+    """Typed read of a webdata file (extra keys such as url are dropped)."""
+    return read_json_as(path, RTSArticle)
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from serialization import read_json, write_json
+
+# Query params that never change the article (share / campaign tracking)
+_TRACKING_PREFIXES = ("utm_", "wt_", "at_")
+_TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref"}
+
+
+def normalize_url(url: str) -> Optional[str]:
+    """
+    Canonical form used as the dedupe key: lowercase scheme/host, https,
+    no fragment, no tracking params, no trailing slash. None if not http(s).
+    """
+    url = (url or "").strip()
+    if not url.lower().startswith(("http://", "https://")):
+        return None
+
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    if host.endswith(":443") or host.endswith(":80"):
+        host = host.rsplit(":", 1)[0]
+
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in _TRACKING_PARAMS and not k.lower().startswith(_TRACKING_PREFIXES)
+    ]
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("https", host, path, urlencode(sorted(query)), ""))
+
+
+def content_hash(text: Optional[str]) -> Optional[str]:
+    """sha256 of the whitespace-normalized body; None for empty bodies."""
+    if not text:
+        return None
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+class IngestIndex:
+    """
+    JSON-backed record of what has been fetched and scored.
+
+    urls:     normalized url -> article_id (webdata file stem)
+    articles: article_id -> {url, body_hash, updated_at, scored: {"model|run": body_hash}}
+
+    An article needs scoring for a (model, run) when it has no output there
+    or its body hash changed since it was scored; known URLs are not
+    re-fetched unless asked to.
+    """
+
+    def __init__(self, path: Path, data: Optional[Dict[str, Any]] = None) -> None:
+        self.path = Path(path)
+        data = data or {}
+        self.urls: Dict[str, str] = data.get("urls", {})
+        self.articles: Dict[str, Dict[str, Any]] = data.get("articles", {})
+
+    @classmethod
+    def load(cls, path: Path) -> "IngestIndex":
+        path = Path(path)
+        if not path.exists():
+            return cls(path)
+        return cls(path, read_json(path))
+
+    def save(self) -> None:
+        tmp = self.path.with_suffix(".tmp")
+        write_json(tmp, {"urls": self.urls, "articles": self.articles})
+        tmp.replace(self.path)
+
+    # ---------- Fetch side ----------
+
+    def needs_fetch(self, url: str, refetch: bool = False) -> bool:
+        key = normalize_url(url)
+        if key is None:
+            return False
+        return refetch or key not in self.urls
+
+    def assign_id(self, url: str, candidate: str) -> str:
+        """
+        Stable article_id for url. If candidate (from make_filename) is already
+        held by a different url, suffix it with a short url hash instead of
+        overwriting the other article's file.
+        """
+        key = normalize_url(url) or url
+        if key in self.urls:
+            return self.urls[key]
+
+        owner = self.articles.get(candidate, {}).get("url")
+        if owner is None or owner == key:
+            return candidate
+        return f"{candidate}_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:8]}"
+
+    def record_article(self, url: str, article_id: str, body: Optional[str]) -> Tuple[str, bool]:
+        """Store the body hash; returns (article_id, changed) where changed covers new articles."""
+        key = normalize_url(url) or url
+        article_id = self.urls.get(key, article_id)
+        new_hash = content_hash(body)
+
+        entry = self.articles.setdefault(article_id, {"url": key, "body_hash": None, "scored": {}})
+        changed = entry["body_hash"] != new_hash or key not in self.urls
+        if changed:
+            entry["body_hash"] = new_hash
+            entry["updated_at"] = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        self.urls[key] = article_id
+        return article_id, changed
+
+    # ---------- Scoring side ----------
+
+    @staticmethod
+    def _score_key(model: str, run: int) -> str:
+        return f"{model}|{run}"
+
+    def needs_scoring(self, article_id: str, model: str, run: int, output_exists: bool) -> bool:
+        """
+        Only a missing output or a real body-hash mismatch triggers a rescore.
+        An existing output with no recorded hash (scored before the index
+        existed, or before a crash lost the last save) is taken as scored for
+        the current body and backfilled.
+        """
+        entry = self.articles.get(article_id)
+        if entry is None:
+            # not ingested through the index (legacy webdata): keep the old file-exists rule
+            return not output_exists
+        if not output_exists:
+            return True
+        key = self._score_key(model, run)
+        if key not in entry["scored"]:
+            entry["scored"][key] = entry["body_hash"]
+            return False
+        return entry["scored"][key] != entry["body_hash"]
+
+    def mark_scored(self, article_id: str, model: str, run: int) -> None:
+        entry = self.articles.get(article_id)
+        if entry is not None:
+            entry["scored"][self._score_key(model, run)] = entry["body_hash"]
@@ -1,26 +1,71 @@
-from dataclasses import asdict, is_dataclass
+import csv
+from dataclasses import asdict, fields, is_dataclass
 from pathlib import Path
 
 from post_processing import create_final_webdata_dataset, prepare_results_frame
+from ingest_index import IngestIndex
 from html_parse import process_input_data, save_data
+from profiling import merge_worker_profiles, profile_dir, profile_stage
 from prompting import score_folder
+from records import ScoreRecord
 from settings import Settings
+from streaming import stream_pipeline
 
 
 def extract_htmls(settings):
-    all_data = process_input_data(settings.input_file)
-    save_data(all_data, settings.webdata_dir)
+    index = IngestIndex.load(settings.index_file)
+    # fetch threads are invisible to cProfile; parsing is profiled in the pool workers
+    parse_profile = profile_dir(settings) if settings.profile and settings.parse_workers != 1 else None
+    if parse_profile is not None:
+        parse_profile.mkdir(parents=True, exist_ok=True)
+    with profile_stage("extract_htmls", settings):
+        all_data = process_input_data(
+            settings.input_file,
+            index=index,
+            refetch=settings.refetch_known,
+            fetch_workers=settings.fetch_workers,
+            parse_workers=settings.parse_workers,
+            profile_to=parse_profile,
+        )
+        save_data(all_data, settings.webdata_dir, index=index)
+    if parse_profile is not None:
+        merge_worker_profiles("parse_html", settings)
+    index.save()
+
+
+def score_articles(settings):
+    with profile_stage("score_folder", settings):
+        score_folder(settings)
+
+
+def run_streaming():
+    """Score articles as they are extracted; append each result to a csv right away."""
+    settings = Settings()
+    out = settings.root / "app" / "bias_data_stream.csv"
+    with open(out, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=[fl.name for fl in fields(ScoreRecord)])
+        if f.tell() == 0:
+            writer.writeheader()
+        # main thread runs the result sink; parse workers profile themselves
+        with profile_stage("run_streaming", settings):
+            for record in stream_pipeline(settings):
+                print(f"{record.model} run {record.run} article {record.article_id}: {record.comment}")
+                writer.writerow(asdict(record))
+                f.flush()
 
 
 def run_pipeline():
     settings = Settings()
     # extract_htmls(settings)
-    # score_folder(settings)
-    results_bias = prepare_results_frame(settings)
+    # score_articles(settings)
+    with profile_stage("prepare_results_frame", settings):
+        results_bias = prepare_results_frame(settings)
     # web_data = create_final_webdata_dataset(settings)
     print('hallo')
     results_bias.to_csv('bias_data_2.csv', index=False)
     # web_data.to_csv('web_data.csv', index=False)
 
-run_pipeline()
 
+# parse pools may start workers with spawn/forkserver, which re-import this module
+if __name__ == "__main__":
+    run_pipeline()
@@ -1,41 +1,44 @@
 from __future__ import annotations
 
 from pathlib import Path
-import json
 import re
 from typing import Any, Dict, List, Optional
 
 import pandas as pd
+
+from html_parse import load_article
+from profiling import profile_stage
+from records import FLOAT32_DECIMALS, ModelScores, ScoreBatch, ScoreRecord
+from serialization import DecodeError, loads, loads_as
+
 _WS_RE = re.compile(r"\s+")
 _TAG_RE = re.compile(r"<[^>]+>")  # cheap HTML tag strip (if any leaked in)
 
 def calculate_overall_bias(df):
-    df['overall_bias'] = df[["subject_bias", "framing_bias", "treatment_bias", "guests_bias"]].mean(axis=1)
+    # scores may be float32 (ScoreBatch): widen and drop the float32 noise
+    # (0.1 -> 0.10000000149) before averaging so the csv shows -0.05, not -0.0500000045
+    scores = df[["subject_bias", "framing_bias", "treatment_bias", "guests_bias"]].astype("float64").round(FLOAT32_DECIMALS)
+    df['overall_bias'] = scores.mean(axis=1)
     return df
 
 def prepare_results_frame(settings):
-    rows = []
+    batch = ScoreBatch()
     for i in range(1,settings.runs+1):
         for model in settings.models:
             this_model_dir = settings.final_dir / model.replace(":", "_") / str(i)
             for p in this_model_dir.glob("*.json"):
                 print(p)
-                data = json.loads(p.read_text(encoding="utf-8"))
-                print(data)
-                row = {
-                    "model": model,
-                    "article_id": p.stem,          # from filename
-                    "subject_bias": data.get("subject_bias"),
-                    "framing_bias": data.get("framing_bias"),
-                    "treatment_bias": data.get("treatment_bias"),
-                    "guests_bias": data.get("guests_bias"),
-                    "confidence": data.get("confidence"),
-                    "comment": data.get("comment"),
-                    "run": i,
-                }
-                rows.append(row)
-
-    df = pd.DataFrame(rows)
+                raw = p.read_bytes()
+                # article_id from filename
+                try:
+                    record = ScoreRecord.from_scores(loads_as(raw, ModelScores), model, p.stem, i)
+                except DecodeError:
+                    # model output off-schema ("0.3", true, "n/a"): coerce field by field
+                    record = ScoreRecord.from_model_output(loads(raw), model, p.stem, i)
+                print(record)
+                batch.append(record)
+
+    df = batch.to_frame()
     df = calculate_overall_bias(df)
     return df
 
@@ -86,7 +89,8 @@ def prepare_raw_frame(webdata_dir: Path) -> pd.DataFrame:
 
     for p in sorted(Path(webdata_dir).glob("*.json")):
         try:
-            data = json.loads(p.read_text(encoding="utf-8"))
+            # typed: a file that does not match RTSArticle is reported, not half-loaded
+            data = dict(vars(load_article(p)))
         except Exception as e:
             print(f"Error reading {p}: {e}")
             continue
@@ -170,9 +174,12 @@ def create_final_webdata_dataset(settings) -> pd.DataFrame:
     No merge with model outputs.
     """
     webdata_dir = Path(settings.webdata_dir)
-    df = prepare_raw_frame(webdata_dir)
-    df = clean_fields(df)
-    df = create_wordcounts(df)
+    with profile_stage("prepare_raw_frame", settings):
+        df = prepare_raw_frame(webdata_dir)
+    with profile_stage("clean_fields", settings):
+        df = clean_fields(df)
+    with profile_stage("create_wordcounts", settings):
+        df = create_wordcounts(df)
 
     # Optional: stable column order
     preferred = [
@@ -0,0 +1,109 @@
+"""
+Opt-in per-stage profiling (Settings.profile).
+
+Each wrapped stage is run under cProfile; the raw stats go to
+final/profiles/<stamp>/<stage>.prof and the top functions of every stage
+are appended to summary.txt in the same folder.
+
+Flamegraphs from the saved stats:
+    flameprof final/profiles/<stamp>/<stage>.prof > stage.svg
+    snakeviz final/profiles/<stamp>/<stage>.prof
+For a sampling profile of a whole run instead (no cProfile overhead):
+    py-spy record -o pipeline.svg -- python app/main.py
+
+cProfile only sees the thread that enabled it. Work shipped to the parse
+process pool is profiled inside each worker (profile_worker_call) and the
+per-process files are merged into one <stage>.prof by merge_worker_profiles.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import os
+import pstats
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+# one folder per process, shared by all stages of the run
+_RUN_STAMP = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+
+def profile_dir(settings) -> Path:
+    return settings.final_dir / "profiles" / _RUN_STAMP
+
+
+def summarize(source, top: int, sort: str = "cumulative") -> str:
+    """source: a Profile or an already loaded pstats.Stats."""
+    buf = io.StringIO()
+    stats = pstats.Stats(source) if isinstance(source, cProfile.Profile) else source
+    stats.stream = buf
+    stats.strip_dirs().sort_stats(sort).print_stats(top)
+    return buf.getvalue()
+
+
+def _append_summary(out_dir: Path, name: str, stats_source, top: int) -> None:
+    with open(out_dir / "summary.txt", "a", encoding="utf-8") as f:
+        f.write(f"========== {name} ==========\n")
+        f.write(summarize(stats_source, top, "cumulative"))
+        f.write(summarize(stats_source, top, "tottime"))
+        f.write("\n")
+
+
+@contextmanager
+def profile_stage(name: str, settings):
+    """No-op unless settings.profile; stages must not be nested."""
+    if not settings.profile:
+        yield
+        return
+
+    out_dir = profile_dir(settings)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(out_dir / f"{name}.prof")
+        _append_summary(out_dir, name, profiler, settings.profile_top)
+        print(f"Profile for {name} written to {out_dir}")
+
+
+# ---------- Process-pool workers ----------
+
+_worker_profiler: Optional[cProfile.Profile] = None
+
+
+def profile_worker_call(name: str, out_dir: Path, fn: Callable[..., Any], *args) -> Any:
+    """
+    Run fn(*args) in a pool worker under that process' own profiler.
+    Stats accumulate over all calls in the process and are re-dumped to
+    <name>.<pid>.part after each call, since pool workers have no exit hook.
+    """
+    global _worker_profiler
+    if _worker_profiler is None:
+        _worker_profiler = cProfile.Profile()
+    _worker_profiler.enable()
+    try:
+        return fn(*args)
+    finally:
+        _worker_profiler.disable()
+        _worker_profiler.dump_stats(Path(out_dir) / f"{name}.{os.getpid()}.part")
+
+
+def merge_worker_profiles(name: str, settings) -> None:
+    """Fold the per-process .part files of a stage into <name>.prof + summary."""
+    out_dir = profile_dir(settings)
+    parts = sorted(out_dir.glob(f"{name}.*.part"))
+    if not parts:
+        return
+    stats = pstats.Stats(str(parts[0]))
+    for p in parts[1:]:
+        stats.add(str(p))
+    stats.dump_stats(out_dir / f"{name}.prof")
+    _append_summary(out_dir, f"{name} ({len(parts)} worker processes)", stats, settings.profile_top)
+    for p in parts:
+        p.unlink()
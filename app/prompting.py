@@ -1,28 +1,182 @@
+import hashlib
 import json
 from pathlib import Path
 import requests
 import re
+import threading
 from typing import Any
 
+from generation_limits import record_generation, update_generation_limits
+from ingest_index import IngestIndex
+from scheduler import ScoreTask, plan_tasks, run_tasks
+from serialization import loads, read_json, write_json
+
 _LEADING_ZERO_NUM = re.compile(r'(:\s*)(-?)00(?=[\d.])')
 
 def parse_json_with_number_fix(raw: str) -> str:
     raw = _LEADING_ZERO_NUM.sub(r"\1\20", raw)  # ": -00.2" -> ": -0.2"
     return raw
 
-def call_ollama(model: str, prompt: str, settings) -> str:
+def call_ollama_full(model: str, prompt: str, settings, options: dict | None = None) -> dict[str, Any]:
+    """Whole /api/generate reply, including eval_count and done_reason."""
     r = requests.post(
         settings.ollama_url,
         json={
             "model": model,
             "prompt": prompt,
             "stream": False,
-            "options": settings.ollama_options,
+            "options": options if options is not None else settings.options_for(model),
         },
         timeout=settings.timeout,
     )
     r.raise_for_status()
-    return r.json().get("response", "")
+    return loads(r.content)
+
+
+def call_ollama(model: str, prompt: str, settings, options: dict | None = None) -> str:
+    return call_ollama_full(model, prompt, settings, options).get("response", "")
+
+
+# ---------- Prompt prefix caching ----------
+
+ARTICLE_SECTION_MARKER = "Article:"
+
+
+def split_prompt_template(template: str) -> tuple[str, str]:
+    """
+    Split prompt.md into the static instruction block (system message) and
+    the per-article part that still contains {{ARTICLE_TEXT}}.
+    """
+    idx = template.find(ARTICLE_SECTION_MARKER)
+    if idx < 0:
+        idx = template.find("{{ARTICLE_TEXT}}")
+    if idx <= 0:
+        raise ValueError("Prompt template has no static prefix before the article")
+    return template[:idx].strip(), template[idx:]
+
+
+class PromptSession:
+    """
+    One chat session per model: the static instructions are sent as an
+    identical system message on every call, so Ollama reuses the KV cache
+    for that prefix while the model stays loaded (keep_alive) and only the
+    article tokens are evaluated.
+
+    The prefix token count is measured once per model and prompt version
+    and persisted in settings.prompt_prefix_file: the model is unloaded
+    first so the measuring call evaluates the prefix cold (with keep_alive
+    the cache is usually hot, and a hot call reports ~0 prompt tokens).
+    Saved tokens per call are estimated as (prefix + article tokens) minus
+    the observed prompt_eval_count, with article tokens estimated from the
+    chars-per-token ratio measured on the prefix.
+    """
+
+    def __init__(self, model: str, settings, options: dict | None = None) -> None:
+        self.model = model
+        self.settings = settings
+        self.system, self.user_template = split_prompt_template(settings.prompt_template)
+        self.options = options if options is not None else settings.options_for(model)
+        self.prefix_tokens = 0
+        self._tokens_per_char = 0.0
+        self._warmed = False
+        self.last_response: dict = {}
+        self.last_prompt_tokens = 0
+        self.stats: dict[str, int] = {}
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.stats = {"calls": 0, "prompt_eval_tokens": 0, "prompt_eval_saved": 0}
+
+    def _chat(self, user: str, options: dict) -> dict:
+        r = requests.post(
+            self.settings.ollama_chat_url,
+            json={
+                "model": self.model,
+                "messages": [
+                    {"role": "system", "content": self.system},
+                    {"role": "user", "content": user},
+                ],
+                "stream": False,
+                "keep_alive": self.settings.keep_alive,
+                "options": options,
+            },
+            timeout=self.settings.timeout,
+        )
+        r.raise_for_status()
+        return loads(r.content)
+
+    def _unload(self) -> None:
+        # generate request without a prompt and keep_alive 0 evicts the model (and its KV cache)
+        r = requests.post(
+            self.settings.ollama_url,
+            json={"model": self.model, "keep_alive": 0},
+            timeout=self.settings.timeout,
+        )
+        r.raise_for_status()
+
+    def warm(self) -> None:
+        """Set prefix_tokens from the persisted count, measuring it cold if there is none."""
+        self._warmed = True
+        key = hashlib.sha1(self.system.encode("utf-8")).hexdigest()
+        path = self.settings.prompt_prefix_file
+        with _prefix_lock:  # a second session for the model reuses the first one's count
+            known = read_json(path) if path.exists() else {}
+            entry = known.get(self.model, {})
+            if entry.get("system_sha1") == key:
+                self.prefix_tokens = int(entry["prefix_tokens"])
+            else:
+                self._unload()
+                data = self._chat("", {**self.options, "num_predict": 1})
+                self.prefix_tokens = int(data.get("prompt_eval_count") or 0)
+                if self.prefix_tokens > 0:
+                    known[self.model] = {"system_sha1": key, "prefix_tokens": self.prefix_tokens}
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    write_json(path, known, pretty=True)
+        self._tokens_per_char = self.prefix_tokens / max(len(self.system), 1)
+
+    def generate(self, article_text: str) -> str:
+        if not self._warmed:
+            self.warm()
+        user = self.user_template.replace("{{ARTICLE_TEXT}}", article_text)
+        data = self._chat(user, self.options)
+        self.last_response = data
+
+        evaluated = int(data.get("prompt_eval_count") or 0)
+        cold = self.prefix_tokens + round(len(user) * self._tokens_per_char)
+        saved = min(self.prefix_tokens, max(0, cold - evaluated))
+        # the cached prefix is not in prompt_eval_count but still occupies the context
+        self.last_prompt_tokens = evaluated + saved
+        self.stats["calls"] += 1
+        self.stats["prompt_eval_tokens"] += evaluated
+        self.stats["prompt_eval_saved"] += saved
+        return data.get("message", {}).get("content", "")
+
+
+_prefix_lock = threading.Lock()
+
+# model -> highest prompt_eval_count / prompt chars seen on /api/generate. Ollama
+# reuses a cached prompt prefix there too, so hot calls undercount the prompt;
+# the ratio from cold calls (e.g. the first one after a model swap) does not.
+_generate_tokens_per_char: dict[str, float] = {}
+
+
+def full_prompt_tokens(model: str, prompt: str, prompt_eval_count: int) -> int:
+    """Prompt size including any cached prefix, for /api/generate calls."""
+    ratio = max(_generate_tokens_per_char.get(model, 0.0), prompt_eval_count / max(len(prompt), 1))
+    _generate_tokens_per_char[model] = ratio
+    return max(prompt_eval_count, round(len(prompt) * ratio))
+
+
+def save_prompt_cache_stats(stats: dict, model: str, run: int, settings) -> None:
+    """Add one batch's counts to the run's totals (a time-boxed run spans several batches)."""
+    # next to the run folders, not inside them: prepare_results_frame globs */<run>/*.json
+    path = settings.final_dir / model.replace(":", "_") / "prompt_cache_stats.json"
+    all_stats = read_json(path) if path.exists() else {}
+    totals = all_stats.setdefault(str(run), {})
+    for k, v in stats.items():
+        totals[k] = totals.get(k, 0) + v
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_json(path, all_stats, pretty=True)
 
 
 def strip_markdown_json(text: str) -> str:
@@ -87,16 +241,35 @@ def parse_json_from_model(text: str) -> dict[str, Any]:
         raise ValueError(msg) from e3
 
 def load_article_body(article_path: Path) -> dict:
-    article = json.loads(article_path.read_text(encoding="utf-8"))
+    article = read_json(article_path)
     body = article["body"]
     return body
 
-def score_one_article(article_path: Path, model: str, settings) -> dict[str, Any]:
+def score_one_article(
+    article_path: Path,
+    model: str,
+    settings,
+    session: PromptSession | None = None,
+    options: dict | None = None,
+) -> dict[str, Any]:
+    """options: settings.options_for(model), loaded once per batch by the caller if given."""
     body = load_article_body(article_path)
-    prompt = settings.prompt_template.replace("{{ARTICLE_TEXT}}", body)
+    if session is not None:
+        options = session.options
+    elif options is None:
+        options = settings.options_for(model)
+    prompt_tokens = None
 
     try:
-        raw = call_ollama(model, prompt, settings)
+        if session is not None:
+            raw = session.generate(body)
+            response = session.last_response
+            prompt_tokens = session.last_prompt_tokens
+        else:
+            prompt = settings.prompt_template.replace("{{ARTICLE_TEXT}}", body)
+            response = call_ollama_full(model, prompt, settings, options)
+            raw = response.get("response", "")
+            prompt_tokens = full_prompt_tokens(model, prompt, int(response.get("prompt_eval_count") or 0))
     except Exception as e:
         return {
             "_error": "call_ollama_failed",
@@ -105,11 +278,12 @@ def score_one_article(article_path: Path, model: str, settings) -> dict[str, Any
             "exception": repr(e),
         }
 
+    parse_failed = False
     try:
         results = parse_json_from_model(raw)
-        return results
     except Exception as e:
-        return {
+        parse_failed = True
+        results = {
             "_error": "json_parse_failed",
             "model": model,
             "article": article_path.name,
@@ -117,27 +291,57 @@ def score_one_article(article_path: Path, model: str, settings) -> dict[str, Any
             "raw_model_output": raw,  # keep this if disk space is ok; otherwise truncate
         }
 
+    # outside the try: a failure to log must not turn a good score into a parse error
+    record_generation(settings, model, response, options, parse_failed=parse_failed, prompt_tokens=prompt_tokens)
+    return results
+
 
 
 def save_model_results(results: dict, output_file: Path) -> None:
-    output_file.write_text(
-        json.dumps(results, ensure_ascii=False, indent=2),
-        encoding="utf-8"
-    )
+    write_json(output_file, results)
 
 def score_folder(settings):
-    i = 0
-    for model in settings.models:
-        print(f"<------NEW MODEL: {model}------>")
-        for i in range(1, settings.runs + 1):
-            print(f"<------------------- Run {i} for model {model} ---------------->")
-            output_folder = settings.final_dir / model.replace(":", "_") / str(i)
-            output_folder.mkdir(parents=True, exist_ok=True)
-            for p in sorted(settings.webdata_dir.glob("*.json")):
-                print(f"Processing article: {p.name}")
-                file_name = output_folder / f"{p.stem}.json"
-                if file_name.exists():
-                    continue
-                score = score_one_article(p, model, settings)
-                save_model_results(score, file_name)
+    """Score all pending (model, run, article) work in priority order, within settings.score_time_budget."""
+    index = IngestIndex.load(settings.index_file)
+    if settings.adaptive_limits:
+        for model, lim in update_generation_limits(settings).items():
+            print(f"{model}: num_predict={lim['num_predict']} num_ctx={lim['num_ctx']} "
+                  f"(p95 output {lim['eval_p95']}, truncated {lim['truncation_rate']:.0%})")
+    tasks = plan_tasks(settings, index)
+    print(f"{len(tasks)} scoring tasks pending")
+
+    # generation_limits.json is read once per batch, not once per article
+    options = {model: settings.options_for(model) for model in settings.models}
+    sessions: dict[str, PromptSession] = {}
+    cache_stats: dict[tuple[str, int], dict[str, int]] = {}
+    n_done = 0
 
+    def score_task(task: ScoreTask) -> None:
+        nonlocal n_done
+        print(f"Processing article: {task.article_path.name} (model {task.model}, run {task.run})")
+        session = None
+        if settings.prompt_cache:
+            session = sessions.get(task.model) or sessions.setdefault(
+                task.model, PromptSession(task.model, settings, options[task.model])
+            )
+            before = dict(session.stats)
+
+        task.output_file.parent.mkdir(parents=True, exist_ok=True)
+        score = score_one_article(task.article_path, task.model, settings, session=session, options=options[task.model])
+        save_model_results(score, task.output_file)
+        index.mark_scored(task.article_path.stem, task.model, task.run)
+        n_done += 1
+        if n_done % settings.index_save_every == 0:
+            index.save()
+
+        if session is not None:
+            acc = cache_stats.setdefault((task.model, task.run), dict.fromkeys(session.stats, 0))
+            for k, v in session.stats.items():
+                acc[k] += v - before[k]
+
+    try:
+        run_tasks(tasks, score_task, budget_s=settings.score_time_budget, checkpoint_file=settings.checkpoint_file)
+    finally:
+        index.save()
+        for (model, run), stats in cache_stats.items():
+            save_prompt_cache_stats(stats, model, run, settings)
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+SCORE_FIELDS = ("subject_bias", "framing_bias", "treatment_bias", "guests_bias", "confidence")
+# float32 holds ~7 significant digits; scores live in [-1, 1]
+FLOAT32_DECIMALS = 6
+
+
+def _to_float(x: Any) -> float:
+    """Model output is untrusted: anything non-numeric becomes NaN."""
+    if x is None or isinstance(x, bool):
+        return math.nan
+    try:
+        return float(x)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+# ---------- Single record ----------
+
+@dataclass(slots=True)
+class ModelScores:
+    """
+    Schema of a saved model result file (prompt.md's JSON reply), for
+    serialization.loads_as. Keys outside it (_error, raw_model_output) are
+    dropped; values that are not numbers fail validation under msgspec.
+    """
+    subject_bias: Optional[float] = None
+    framing_bias: Optional[float] = None
+    treatment_bias: Optional[float] = None
+    guests_bias: Optional[float] = None
+    confidence: Optional[float] = None
+    comment: Optional[str] = None
+
+
+@dataclass(slots=True, frozen=True)
+class ScoreRecord:
+    model: str
+    article_id: str
+    run: int
+
+    subject_bias: float
+    framing_bias: float
+    treatment_bias: float
+    guests_bias: float
+    confidence: float
+
+    comment: Optional[str] = None
+
+    @classmethod
+    def from_model_output(cls, data: Dict[str, Any], model: str, article_id: str, run: int) -> "ScoreRecord":
+        """Build from the dict returned by parse_json_from_model (or an `_error` dict)."""
+        comment = data.get("comment")
+        return cls(
+            model=model,
+            article_id=str(article_id),
+            run=int(run),
+            comment=str(comment) if comment is not None else None,
+            **{f: _to_float(data.get(f)) for f in SCORE_FIELDS},
+        )
+
+    @classmethod
+    def from_scores(cls, scores: ModelScores, model: str, article_id: str, run: int) -> "ScoreRecord":
+        """Build from a typed ModelScores (still coerced: without msgspec it is unvalidated)."""
+        return cls(
+            model=model,
+            article_id=str(article_id),
+            run=int(run),
+            comment=str(scores.comment) if scores.comment is not None else None,
+            **{f: _to_float(getattr(scores, f)) for f in SCORE_FIELDS},
+        )
+
+
+# ---------- Columnar batch ----------
+
+class _Interner:
+    """str -> int32 code; code -1 means missing (pandas/arrow null convention)."""
+    __slots__ = ("codes", "values")
+
+    def __init__(self) -> None:
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def code(self, s: Optional[str]) -> int:
+        if s is None:
+            return -1
+        c = self.codes.get(s)
+        if c is None:
+            c = self.codes[s] = len(self.values)
+            self.values.append(s)
+        return c
+
+
+class ScoreBatch:
+    """
+    Array-backed container for many ScoreRecords.
+    Scores are float32 columns; model, article and comment strings are stored
+    once and referenced by int32 codes, so memory grows with the number of
+    scores, not with the length of the repeated strings.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self._n = 0
+        self._models = _Interner()
+        self._articles = _Interner()
+        self._comments = _Interner()
+        self._alloc(max(capacity, 1))
+
+    def _alloc(self, capacity: int) -> None:
+        old = getattr(self, "_cols", None)
+        cols = {f: np.full(capacity, np.nan, dtype=np.float32) for f in SCORE_FIELDS}
+        cols["model"] = np.empty(capacity, dtype=np.int32)
+        cols["article_id"] = np.empty(capacity, dtype=np.int32)
+        cols["comment"] = np.empty(capacity, dtype=np.int32)
+        cols["run"] = np.empty(capacity, dtype=np.int16)
+        if old is not None:
+            for k, arr in old.items():
+                cols[k][: self._n] = arr[: self._n]
+        self._cols = cols
+
+    def __len__(self) -> int:
+        return self._n
+
+    def append(self, rec: ScoreRecord) -> None:
+        if self._n == len(self._cols["run"]):
+            self._alloc(2 * self._n)
+        i = self._n
+        c = self._cols
+        for f in SCORE_FIELDS:
+            c[f][i] = getattr(rec, f)
+        c["model"][i] = self._models.code(rec.model)
+        c["article_id"][i] = self._articles.code(rec.article_id)
+        c["comment"][i] = self._comments.code(rec.comment)
+        c["run"][i] = rec.run
+        self._n += 1
+
+    def extend(self, records: Iterable[ScoreRecord]) -> None:
+        for rec in records:
+            self.append(rec)
+
+    def record(self, i: int) -> ScoreRecord:
+        c = self._cols
+        comment = int(c["comment"][i])
+        return ScoreRecord(
+            model=self._models.values[c["model"][i]],
+            article_id=self._articles.values[c["article_id"][i]],
+            run=int(c["run"][i]),
+            comment=self._comments.values[comment] if comment >= 0 else None,
+            **{f: float(c[f][i]) for f in SCORE_FIELDS},
+        )
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield self.record(i)
+
+    def _view(self, name: str) -> np.ndarray:
+        # slices are views: no copy of the underlying buffer. Read-only, so
+        # writes through an exported frame cannot corrupt the batch.
+        view = self._cols[name][: self._n]
+        view.flags.writeable = False
+        return view
+
+    # ---------- Export ----------
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        DataFrame in the prepare_results_frame column layout.
+        Score and run columns are read-only views of the batch buffers (no
+        copy; copy a column before writing to it). String columns are
+        categoricals over the interned tables; pandas narrows their int32
+        codes to the smallest integer type, so the codes are copied.
+        """
+        def cat(name: str, interner: _Interner) -> pd.Categorical:
+            return pd.Categorical.from_codes(self._view(name), categories=pd.Index(interner.values, dtype=object))
+
+        data = {
+            "model": cat("model", self._models),
+            "article_id": cat("article_id", self._articles),
+            **{f: self._view(f) for f in SCORE_FIELDS},
+            "comment": cat("comment", self._comments),
+            "run": self._view("run"),
+        }
+        return pd.DataFrame(data, copy=False)
+
+    def to_arrow(self):
+        """pyarrow Table; strings become dictionary arrays over the interned tables."""
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("ScoreBatch.to_arrow requires pyarrow (pip install pyarrow)") from e
+
+        def dict_col(name: str, interner: _Interner):
+            codes = self._view(name)
+            return pa.DictionaryArray.from_arrays(
+                pa.array(codes, mask=codes < 0),
+                pa.array(interner.values, type=pa.string()),
+            )
+
+        return pa.table({
+            "model": dict_col("model", self._models),
+            "article_id": dict_col("article_id", self._articles),
+            **{f: pa.array(self._view(f)) for f in SCORE_FIELDS},
+            "comment": dict_col("comment", self._comments),
+            "run": pa.array(self._view("run")),
+        })
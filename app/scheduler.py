@@ -0,0 +1,124 @@
+"""
+Ordering and time-boxing of pending (model, run, article) scoring work.
+
+Tasks are sorted by, in order:
+    1. manually flagged articles (settings.priority_file) first
+    2. fresh articles (published within settings.fresh_window_h) next, so a
+       breaking article is scored by every model before any backfill
+    3. lower run number first, so every article gets a run-1 score early
+    4. model order from settings.models: within a (flagged, fresh, run) tier
+       all of one model's work is done before the next model is loaded, so
+       Ollama swaps models once per tier instead of on almost every call
+    5. newer publish time first (date_published; undated articles last)
+    6. article id
+
+With a time budget, a task is only started if the elapsed time plus the
+mean task duration so far fits; otherwise the remaining tasks are written
+to a checkpoint file and the batch stops. Anything not done is picked up
+again by the next plan, since pending work is derived from the index.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, List, Optional, Set
+
+from ingest_index import IngestIndex, normalize_url
+from serialization import read_json, write_json
+
+
+@dataclass(order=True, frozen=True)
+class ScoreTask:
+    sort_key: tuple
+    model: str = field(compare=False)
+    run: int = field(compare=False)
+    article_path: Path = field(compare=False)
+    output_file: Path = field(compare=False)
+
+
+def publish_timestamp(article_path: Path) -> Optional[float]:
+    try:
+        raw = read_json(article_path).get("date_published")
+        return datetime.strptime(raw, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc).timestamp()
+    except Exception:
+        # missing / unparsable date: schedule as oldest
+        return None
+
+
+def load_flagged(settings, index: IngestIndex) -> Set[str]:
+    """Article ids (or urls, resolved through the index) listed one per line."""
+    path = settings.priority_file
+    if not path.exists():
+        return set()
+    flagged = set()
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        url = normalize_url(line)
+        flagged.add(index.urls.get(url, line) if url else line)
+    return flagged
+
+
+def plan_tasks(settings, index: IngestIndex, now: Optional[float] = None) -> List[ScoreTask]:
+    flagged = load_flagged(settings, index)
+    model_rank = {m: i for i, m in enumerate(settings.models)}
+    fresh_after = (time.time() if now is None else now) - settings.fresh_window_h * 3600
+
+    tasks = []
+    for p in settings.webdata_dir.glob("*.json"):
+        ts = publish_timestamp(p)
+        newest = -ts if ts is not None else float("inf")
+        fresh = ts is not None and ts >= fresh_after
+        for model in settings.models:
+            for run in range(1, settings.runs + 1):
+                out = settings.final_dir / model.replace(":", "_") / str(run) / f"{p.stem}.json"
+                if not index.needs_scoring(p.stem, model, run, out.exists()):
+                    continue
+                key = (p.stem not in flagged, not fresh, run, model_rank[model], newest, p.stem)
+                tasks.append(ScoreTask(key, model, run, p, out))
+    tasks.sort()
+    return tasks
+
+
+def run_tasks(
+    tasks: List[ScoreTask],
+    score_fn: Callable[[ScoreTask], None],
+    budget_s: Optional[float] = None,
+    checkpoint_file: Optional[Path] = None,
+) -> List[ScoreTask]:
+    """Run tasks in order until done or out of budget; returns what is left."""
+    start = time.monotonic()
+    mean_s = 0.0
+    for n, task in enumerate(tasks):
+        elapsed = time.monotonic() - start
+        if budget_s is not None and elapsed + mean_s > budget_s:
+            remaining = tasks[n:]
+            print(f"Time budget of {budget_s}s reached after {n} tasks, {len(remaining)} left")
+            if checkpoint_file is not None:
+                write_checkpoint(checkpoint_file, remaining, done=n, budget_s=budget_s)
+            return remaining
+
+        t0 = time.monotonic()
+        score_fn(task)
+        mean_s += (time.monotonic() - t0 - mean_s) / (n + 1)
+
+    if checkpoint_file is not None and checkpoint_file.exists():
+        checkpoint_file.unlink()
+    return []
+
+
+def write_checkpoint(path: Path, remaining: List[ScoreTask], done: int, budget_s: float) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_json(path, {
+        "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+        "budget_s": budget_s,
+        "done": done,
+        "remaining": [
+            {"model": t.model, "run": t.run, "article_id": t.article_path.stem}
+            for t in remaining
+        ],
+    }, pretty=True)
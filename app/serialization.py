@@ -0,0 +1,144 @@
+"""
+Single place for JSON encoding/decoding used by every pipeline hop.
+
+Backend is picked once at import: orjson, then msgspec, then stdlib json.
+Output is compact UTF-8 by default; pass pretty=True for indent=2 files
+meant to be read by humans. Files written with the old indent=2 format
+read back the same way.
+
+Typed decoding (loads_as / read_json_as) goes through msgspec whenever it
+is installed, even if orjson does the untyped work: msgspec checks every
+field against the dataclass annotations and raises a DecodeError on a
+mismatch. Without msgspec, unknown keys are dropped and values are passed
+through unchecked.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import asdict, fields, is_dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, NamedTuple, Type, TypeVar
+
+T = TypeVar("T")
+
+
+class Backend(NamedTuple):
+    name: str
+    dumps: Callable[[Any, bool], bytes]
+    loads: Callable[[Any], Any]
+    loads_as: Callable[[Any, type], Any]
+
+
+def _to_builtin(obj):
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _dataclass_from_dict(data: Dict[str, Any], cls: Type[T]) -> T:
+    # unknown keys (e.g. the "url" added at ingestion) are ignored, like msgspec does
+    names = {f.name for f in fields(cls)}
+    return cls(**{k: v for k, v in data.items() if k in names})
+
+
+def _stdlib_backend() -> Backend:
+    def dumps(obj, pretty=False):
+        if pretty:
+            return json.dumps(obj, ensure_ascii=False, indent=2, default=_to_builtin).encode("utf-8")
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_to_builtin).encode("utf-8")
+
+    def loads(raw):
+        return json.loads(raw)
+
+    def loads_as(raw, cls):
+        return _dataclass_from_dict(json.loads(raw), cls)
+
+    return Backend("json", dumps, loads, loads_as)
+
+
+def _orjson_backend() -> Backend:
+    import orjson
+
+    def dumps(obj, pretty=False):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0, default=_to_builtin)
+
+    def loads_as(raw, cls):
+        return _dataclass_from_dict(orjson.loads(raw), cls)
+
+    return Backend("orjson", dumps, orjson.loads, loads_as)
+
+
+def _msgspec_backend() -> Backend:
+    import msgspec
+
+    encoder = msgspec.json.Encoder()
+    decoders: Dict[type, Any] = {}
+
+    def dumps(obj, pretty=False):
+        out = encoder.encode(obj)
+        return msgspec.json.format(out, indent=2) if pretty else out
+
+    def loads_as(raw, cls):
+        dec = decoders.get(cls)
+        if dec is None:
+            dec = decoders[cls] = msgspec.json.Decoder(type=cls)
+        return dec.decode(raw)
+
+    return Backend("msgspec", dumps, msgspec.json.decode, loads_as)
+
+
+def available_backends() -> Dict[str, Backend]:
+    out = {}
+    for factory in (_orjson_backend, _msgspec_backend, _stdlib_backend):
+        try:
+            b = factory()
+        except ImportError:
+            continue
+        out[b.name] = b
+    return out
+
+
+_BACKENDS = available_backends()
+BACKEND = next(iter(_BACKENDS.values()))
+TYPED_BACKEND = _BACKENDS.get("msgspec", BACKEND)
+
+# Everything the backends raise on malformed input (msgspec.ValidationError is a DecodeError)
+DecodeError: tuple = (json.JSONDecodeError,)
+try:
+    import msgspec as _msgspec
+    DecodeError = (json.JSONDecodeError, _msgspec.DecodeError)
+except ImportError:
+    pass
+
+
+# ---------- Public API ----------
+
+def dumps(obj: Any, pretty: bool = False) -> bytes:
+    return BACKEND.dumps(obj, pretty)
+
+
+def _exact(raw):
+    # orjson/msgspec reject str subclasses such as bs4's NavigableString
+    return str(raw) if isinstance(raw, str) and type(raw) is not str else raw
+
+
+def loads(raw: bytes | str) -> Any:
+    return BACKEND.loads(_exact(raw))
+
+
+def loads_as(raw: bytes | str, cls: Type[T]) -> T:
+    """Decode straight into a dataclass (e.g. RTSArticle); unknown keys are dropped."""
+    return TYPED_BACKEND.loads_as(_exact(raw), cls)
+
+
+def read_json(path: Path) -> Any:
+    return loads(Path(path).read_bytes())
+
+
+def read_json_as(path: Path, cls: Type[T]) -> T:
+    return loads_as(Path(path).read_bytes(), cls)
+
+
+def write_json(path: Path, obj: Any, pretty: bool = False) -> None:
+    Path(path).write_bytes(dumps(obj, pretty))
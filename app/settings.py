@@ -4,6 +4,7 @@ Configuration values are accessed via attributes or properties:
     settings.webdata_dir
     settings.models
     settings.ollama_options
+    settings.options_for(model)
     settings.prompt_template
 """
 
@@ -12,9 +13,10 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
 from app.paths import project_root_from_file
+from serialization import read_json
 
 ModelOptions = Dict[str, Any]
 
@@ -27,6 +29,26 @@ class Settings:
     runs: int = 6
     timeout: int = 200
     ollama_url: str = "http://127.0.0.1:11434/api/generate"
+    # send prompt.md's static block as a chat system message so Ollama reuses its KV cache
+    prompt_cache: bool = False
+    keep_alive: str = "30m"
+    # html ingestion: threads for network fetches, processes for parsing (0 = one per core)
+    fetch_workers: int = 8
+    parse_workers: int = 0
+    # streaming mode (streaming.py): bounded queue size between stages, concurrent Ollama calls
+    stream_queue_size: int = 16
+    score_workers: int = 1
+    # score_folder stops starting new work after this many seconds (None = no limit)
+    score_time_budget: Optional[float] = None
+    # articles published within this many hours are scored by every model before older work
+    fresh_window_h: float = 24.0
+    # score_folder saves the ingest index every this many tasks, so a crash loses little
+    index_save_every: int = 20
+    # cProfile each pipeline stage into final/profiles/ (see profiling.py)
+    profile: bool = False
+    profile_top: int = 25
+    # re-fetch urls already in the ingest index to detect edited articles
+    refetch_known: bool = False
 
     models: List[str] = field(default_factory=lambda: [
         "llama3.2:latest",
@@ -43,6 +65,17 @@ class Settings:
         "num_ctx": 2048,
     })
 
+    # Per-model overrides, e.g. {"phi3:mini": {"num_predict": 400}}; always win
+    model_options: Dict[str, ModelOptions] = field(default_factory=dict)
+
+    # Use num_predict / num_ctx derived from observed outputs (generation_limits.py)
+    adaptive_limits: bool = False
+    adaptive_min_samples: int = 20
+
+    @property
+    def ollama_chat_url(self) -> str:
+        return self.ollama_url.replace("/api/generate", "/api/chat")
+
     # ---- resolved paths (absolute) ----
     @property
     def input_file(self) -> Path:
@@ -56,6 +89,32 @@ class Settings:
     def final_dir(self) -> Path:
         return self.root / "app" / "final"
 
+    @property
+    def index_file(self) -> Path:
+        return self.root / "app" / "ingest_index.json"
+
+    @property
+    def generation_stats_file(self) -> Path:
+        return self.final_dir / "generation_stats.jsonl"
+
+    @property
+    def generation_limits_file(self) -> Path:
+        return self.final_dir / "generation_limits.json"
+
+    @property
+    def prompt_prefix_file(self) -> Path:
+        # cold-measured token count of prompt.md's static block, per model
+        return self.final_dir / "prompt_prefix_tokens.json"
+
+    @property
+    def priority_file(self) -> Path:
+        # article ids or urls to score first, one per line
+        return self.root / "app" / "input_files" / "priority_articles.txt"
+
+    @property
+    def checkpoint_file(self) -> Path:
+        return self.final_dir / "schedule_checkpoint.json"
+
     @property
     def prompt_template_path(self) -> Path:
         return self.root / "app" / "prompt.md"
@@ -65,6 +124,15 @@ class Settings:
     def prompt_template(self) -> str:
         return self.prompt_template_path.read_text(encoding="utf-8")
 
+    def options_for(self, model: str) -> ModelOptions:
+        """Global options < adaptive limits (if enabled) < explicit model_options."""
+        options = dict(self.ollama_options)
+        if self.adaptive_limits and self.generation_limits_file.exists():
+            learned = read_json(self.generation_limits_file).get(model, {})
+            options.update({k: learned[k] for k in ("num_predict", "num_ctx") if k in learned})
+        options.update(self.model_options.get(model, {}))
+        return options
+
     def __post_init__(self) -> None:
         # Hard fail early if structure is wrong
         if not (self.root / "app").is_dir():
@@ -0,0 +1,219 @@
+"""
+Streaming variant of run_pipeline: fetch -> parse -> save -> score -> result.
+
+Every stage runs on its own worker threads and hands items on through a
+bounded queue, so a slow stage blocks the ones before it (backpressure) and
+memory stays flat however many urls are queued. Results are yielded as soon
+as each (article, model, run) is scored instead of after the whole batch.
+
+Parsing is still done in a process pool; the parse threads only wait on it.
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+from generation_limits import update_generation_limits
+from html_parse import _now_utc, _parse_worker, fetch_rts_html, read_input_urls, save_data
+from ingest_index import IngestIndex, normalize_url
+from prompting import PromptSession, save_model_results, save_prompt_cache_stats, score_one_article
+from profiling import merge_worker_profiles, profile_dir, profile_worker_call
+from records import ScoreRecord
+
+_DONE = object()
+_POLL = 0.2  # seconds; how often blocked workers check for shutdown
+
+
+class _Stage:
+    """
+    n worker threads applying fn to items from inq and putting results on outq.
+    fn returning None drops the item; with fan_out, fn returns an iterable of
+    items. Exceptions are reported and the item dropped, like process_input_data.
+    The last worker to finish forwards the end-of-stream marker.
+    """
+
+    def __init__(self, name: str, fn: Callable[[Any], Any], inq: queue.Queue, outq: queue.Queue,
+                 stop: threading.Event, workers: int = 1, fan_out: bool = False) -> None:
+        self.name = name
+        self.fn = fn
+        self.inq = inq
+        self.outq = outq
+        self.stop = stop
+        self.fan_out = fan_out
+        self._alive = max(workers, 1)
+        self._lock = threading.Lock()
+        self.threads = [
+            threading.Thread(target=self._run, name=f"{name}-{i}", daemon=True)
+            for i in range(self._alive)
+        ]
+
+    def start(self) -> "_Stage":
+        for t in self.threads:
+            t.start()
+        return self
+
+    def _run(self) -> None:
+        while not self.stop.is_set():
+            item = _get(self.inq, self.stop)
+            if item is _DONE:
+                _put(self.inq, _DONE, self.stop)  # let sibling workers see it too
+                break
+            if item is None:
+                continue
+            try:
+                out = self.fn(item)
+            except Exception as e:
+                print(f"[{self.name}] Error processing {item!r:.120}: {e}")
+                continue
+            for o in (out if self.fan_out else [out]):
+                if o is not None:
+                    _put(self.outq, o, self.stop)
+
+        with self._lock:
+            self._alive -= 1
+            last = self._alive == 0
+        if last:
+            _put(self.outq, _DONE, self.stop)
+
+
+def _get(q: queue.Queue, stop: threading.Event):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=_POLL)
+        except queue.Empty:
+            continue
+    return None
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> None:
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=_POLL)
+            return
+        except queue.Full:
+            continue
+
+
+def stream_pipeline(settings, urls: Optional[Iterable[str]] = None) -> Iterator[ScoreRecord]:
+    """
+    Yield a ScoreRecord for every (article, model, run) as soon as it is
+    scored and saved. urls defaults to settings.input_file; known urls are
+    skipped via the ingest index, and articles whose body did not change
+    are only scored where the index says so.
+    """
+    index = IngestIndex.load(settings.index_file)
+    if settings.adaptive_limits:
+        update_generation_limits(settings)
+    index_lock = threading.Lock()  # saver and sink both touch the index
+    stop = threading.Event()
+    size = settings.stream_queue_size
+    q_urls, q_html, q_articles, q_saved, q_tasks, q_results = (queue.Queue(maxsize=size) for _ in range(6))
+
+    parse_workers = settings.parse_workers or os.cpu_count()
+    parse_pool = ProcessPoolExecutor(max_workers=parse_workers)
+    options = {model: settings.options_for(model) for model in settings.models}
+    sessions = threading.local()
+    cache_stats: dict = {}  # (model, run) -> summed PromptSession.stats deltas
+    stats_lock = threading.Lock()
+
+    def fetch(url: str):
+        return url, fetch_rts_html(url), _now_utc()
+
+    def parse(item):
+        if settings.profile:
+            return parse_pool.submit(profile_worker_call, "parse_html", profile_dir(settings), _parse_worker, *item).result()
+        return parse_pool.submit(_parse_worker, *item).result()
+
+    def save(article: dict) -> Optional[Path]:
+        with index_lock:
+            save_data([article], settings.webdata_dir, index=index)
+            article_id = index.urls.get(normalize_url(article["url"]))
+        path = settings.webdata_dir / f"{article_id}.json"
+        return path if path.exists() else None
+
+    def plan(path: Path) -> List[tuple]:
+        tasks = []
+        for model in settings.models:
+            for run in range(1, settings.runs + 1):
+                out = settings.final_dir / model.replace(":", "_") / str(run) / f"{path.stem}.json"
+                with index_lock:
+                    needed = index.needs_scoring(path.stem, model, run, out.exists())
+                if needed:
+                    tasks.append((path, model, run, out))
+        return tasks
+
+    def score(task):
+        path, model, run, out = task
+        session = None
+        if settings.prompt_cache:
+            per_thread = sessions.__dict__.setdefault("by_model", {})
+            session = per_thread.get(model) or per_thread.setdefault(model, PromptSession(model, settings, options[model]))
+            before = dict(session.stats)
+        result = score_one_article(path, model, settings, session=session, options=options[model])
+        if session is not None:
+            with stats_lock:
+                acc = cache_stats.setdefault((model, run), dict.fromkeys(session.stats, 0))
+                for k, v in session.stats.items():
+                    acc[k] += v - before[k]
+        return task, result
+
+    settings.webdata_dir.mkdir(parents=True, exist_ok=True)
+    if settings.profile:
+        profile_dir(settings).mkdir(parents=True, exist_ok=True)
+    stages = [
+        _Stage("fetch", fetch, q_urls, q_html, stop, workers=settings.fetch_workers),
+        _Stage("parse", parse, q_html, q_articles, stop, workers=parse_workers),
+        _Stage("save", save, q_articles, q_saved, stop),
+        _Stage("plan", plan, q_saved, q_tasks, stop, fan_out=True),
+        _Stage("score", score, q_tasks, q_results, stop, workers=settings.score_workers),
+    ]
+
+    def feed():
+        source = read_input_urls(settings.input_file) if urls is None else urls
+        seen = set()
+        for url in source:
+            # the normalized form is only the dedupe / index key; fetch the link as given
+            key = normalize_url(url)
+            if key is None or key in seen:
+                continue
+            seen.add(key)
+            with index_lock:
+                needed = index.needs_fetch(key, refetch=settings.refetch_known)
+            if needed:
+                _put(q_urls, url.strip(), stop)
+        _put(q_urls, _DONE, stop)
+
+    threading.Thread(target=feed, name="feed", daemon=True).start()
+    for s in stages:
+        s.start()
+
+    n_done = 0
+    try:
+        while True:
+            item = _get(q_results, stop)
+            if item is _DONE or item is None:
+                break
+            (path, model, run, out), result = item
+            out.parent.mkdir(parents=True, exist_ok=True)
+            save_model_results(result, out)
+            n_done += 1
+            with index_lock:
+                index.mark_scored(path.stem, model, run)
+                if n_done % settings.index_save_every == 0:
+                    index.save()
+            yield ScoreRecord.from_model_output(result, model, path.stem, run)
+    finally:
+        stop.set()
+        parse_pool.shutdown(cancel_futures=True)
+        if settings.profile:
+            merge_worker_profiles("parse_html", settings)
+        with index_lock:
+            index.save()
+        with stats_lock:
+            for (model, run), stats in cache_stats.items():
+                save_prompt_cache_stats(stats, model, run, settings)
@@ -0,0 +1,27 @@
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+# app modules import each other flat (``from records import ...``) while
+# settings.py imports ``app.paths``: both the root and app/ must be importable.
+ROOT = Path(__file__).resolve().parents[1]
+for p in (ROOT, ROOT / "app"):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+
+@pytest.fixture
+def project_settings(tmp_path):
+    """Settings factory rooted in a scratch project: app/ with prompt.md, webdata/ and input_files/."""
+    from settings import Settings
+
+    (tmp_path / "app" / "webdata").mkdir(parents=True)
+    (tmp_path / "app" / "input_files").mkdir()
+    shutil.copy(ROOT / "app" / "prompt.md", tmp_path / "app" / "prompt.md")
+
+    def make(**kwargs) -> Settings:
+        return Settings(root=tmp_path, **kwargs)
+
+    return make
@@ -0,0 +1,144 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import agreement
+from test.conftest import ROOT
+
+
+def naive_alpha_interval(units):
+    """Textbook Krippendorff alpha (interval) from explicit value pairs."""
+    units = [[v for v in u if not np.isnan(v)] for u in units]
+    units = [u for u in units if len(u) >= 2]
+    n = sum(len(u) for u in units)
+    d_o = sum(
+        sum((a - b) ** 2 for a, b in itertools.permutations(u, 2)) / (len(u) - 1)
+        for u in units
+    ) / n
+    values = [v for u in units for v in u]
+    d_e = sum((a - b) ** 2 for a, b in itertools.permutations(values, 2)) / (n * (n - 1))
+    return 1 - d_o / d_e
+
+
+@pytest.fixture(scope="module")
+def bias_df():
+    return pd.read_csv(ROOT / "app" / "bias_data_2.csv")
+
+
+def test_alpha_matches_naive_pairwise(bias_df):
+    cube, models, _, _ = agreement.score_cube(bias_df)
+    alpha = agreement.krippendorff_alpha_interval(cube)
+    for i in range(len(models)):
+        expected = naive_alpha_interval(cube[i].tolist())
+        assert alpha[i] == pytest.approx(expected, nan_ok=True)
+
+
+def test_alpha_with_missing_values():
+    x = np.array([[1.0, 1.0, np.nan], [2.0, 3.0, 2.0], [np.nan, 4.0, 4.0], [5.0, np.nan, np.nan]])
+    assert agreement.krippendorff_alpha_interval(x) == pytest.approx(naive_alpha_interval(x.tolist()))
+
+
+def test_icc_shrout_fleiss():
+    # Shrout & Fleiss (1979) table 2: ICC(1,1) = 0.17
+    x = np.array([
+        [9, 2, 5, 8], [6, 1, 3, 2], [8, 4, 6, 8],
+        [7, 1, 2, 6], [10, 5, 6, 9], [6, 2, 4, 7],
+    ], dtype=float)
+    assert agreement.icc_oneway(x) == pytest.approx(0.166, abs=1e-3)
+
+
+def test_perfect_agreement():
+    x = np.array([[0.1, 0.1, 0.1], [-0.5, -0.5, -0.5], [0.3, 0.3, 0.3]])
+    assert agreement.icc_oneway(x) == pytest.approx(1.0)
+    assert agreement.krippendorff_alpha_interval(x) == pytest.approx(1.0)
+
+
+def test_statistics_broadcast_over_leading_axes():
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(3, 4, 10, 5))
+    alpha = agreement.krippendorff_alpha_interval(x)
+    assert alpha.shape == (3, 4)
+    assert alpha[2, 1] == pytest.approx(agreement.krippendorff_alpha_interval(x[2, 1]))
+
+
+def test_bootstrap_ci_shape_and_order():
+    rng = np.random.default_rng(1)
+    x = rng.normal(size=(4, 20, 6)) + rng.normal(size=(4, 20, 1))
+    lo, hi = agreement.bootstrap_ci(x, agreement.icc_oneway, n_boot=250, seed=0, batch_size=64)
+    assert lo.shape == hi.shape == (4,)
+    assert np.all(lo <= hi)
+
+
+def test_bootstrap_ci_is_seeded():
+    x = np.random.default_rng(2).normal(size=(2, 15, 3))
+    a = agreement.bootstrap_ci(x, agreement.krippendorff_alpha_interval, n_boot=100, seed=7)
+    b = agreement.bootstrap_ci(x, agreement.krippendorff_alpha_interval, n_boot=100, seed=7)
+    np.testing.assert_array_equal(a, b)
+
+
+def test_score_cube_rejects_duplicates(bias_df):
+    dup = pd.concat([bias_df, bias_df.head(1)])
+    with pytest.raises(ValueError, match="duplicate"):
+        agreement.score_cube(dup)
+
+
+def test_report_frames(bias_df):
+    report = agreement.agreement_report(bias_df, n_boot=50)
+    models = sorted(bias_df["model"].unique())
+    assert list(report["model_reliability"]["model"]) == models
+    assert report["inter_model_alpha"].shape == (len(models), len(models))
+    assert np.allclose(np.diag(report["inter_model_mean_abs_diff"]), 0)
+
+
+@pytest.mark.parametrize("stat", [agreement.krippendorff_alpha_interval, agreement.icc_oneway])
+def test_resampling_unit_sums_matches_gathering(stat):
+    x = np.random.default_rng(3).normal(size=(3, 30, 4))
+    x[0, 2, 1] = x[1, 5, :3] = np.nan
+    unit_sums, from_sums = agreement._UNIT_SUMS[stat]
+    idx = np.random.default_rng(4).integers(0, 30, size=(5, 30))
+    w = np.stack([np.bincount(row, minlength=30) for row in idx]).astype(float)
+    np.testing.assert_allclose(from_sums(w @ unit_sums(x), 4), stat(x[..., idx, :]))
+
+
+def _long_frame(n_models, n_articles, n_runs, seed=0):
+    rng = np.random.default_rng(seed)
+    lean = rng.normal(scale=0.3, size=(1, n_articles, 1))
+    scores = lean + rng.normal(scale=0.1, size=(n_models, 1, 1)) + rng.normal(scale=0.2, size=(n_models, n_articles, n_runs))
+    m, a, r = np.indices(scores.shape).reshape(3, -1)
+    return pd.DataFrame({"model": [f"m{i}" for i in m], "article_id": a, "run": r + 1,
+                         "overall_bias": scores.ravel()})
+
+
+def test_bootstrap_memory_is_bounded_at_scale():
+    # 10 models x 5000 articles x 6 runs, 1000 replicates: gathering
+    # (model, replicates, article, run) copies used to take several GB
+    import tracemalloc
+    cube, *_ = agreement.score_cube(_long_frame(10, 5000, 6))
+    means = agreement._model_means(cube)
+    i, j = np.triu_indices(len(means), k=1)
+    pairs = np.stack([means[i], means[j]], axis=-1)
+
+    tracemalloc.start()
+    try:
+        icc_ci = agreement.bootstrap_ci(cube, agreement.icc_oneway, seed=0)
+        alpha_ci = agreement.bootstrap_ci(cube, agreement.krippendorff_alpha_interval, seed=0)
+        pair_ci = agreement.bootstrap_ci(pairs, agreement.krippendorff_alpha_interval, seed=0)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert peak < 200 * 2**20
+    for (lo, hi), point in [(icc_ci, agreement.icc_oneway(cube)),
+                            (alpha_ci, agreement.krippendorff_alpha_interval(cube)),
+                            (pair_ci, agreement.krippendorff_alpha_interval(pairs))]:
+        assert np.all((lo <= point) & (point <= hi))
+
+
+def test_inter_model_agreement_upper_triangle_mirrors():
+    inter = agreement.inter_model_agreement(_long_frame(4, 300, 3), n_boot=200, seed=0)
+    for name in ("alpha", "alpha_lo", "alpha_hi", "mean_abs_diff"):
+        arr = inter[name].to_numpy()
+        np.testing.assert_allclose(arr, arr.T)
+    assert np.all(np.diag(inter["alpha"]) == 1.0)
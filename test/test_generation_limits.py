@@ -0,0 +1,164 @@
+from dataclasses import replace
+
+import pandas as pd
+import pytest
+
+import prompting
+import settings as settings_module
+from generation_limits import derive_limits, load_observations, record_generation, update_generation_limits
+from serialization import dumps, write_json
+
+MODEL = "phi3:mini"
+
+
+@pytest.fixture
+def settings(project_settings, monkeypatch):
+    monkeypatch.setattr(prompting, "_generate_tokens_per_char", {})
+    return project_settings(models=[MODEL], adaptive_limits=True, adaptive_min_samples=20)
+
+
+def simulate(settings, true_lengths):
+    """One batch of calls at the limit options_for currently gives, like Ollama would cap them."""
+    options = settings.options_for(MODEL)
+    for n in true_lengths:
+        truncated = n > options["num_predict"]
+        response = {"eval_count": min(n, options["num_predict"]), "prompt_eval_count": 900,
+                    "done_reason": "length" if truncated else "stop"}
+        record_generation(settings, MODEL, response, options, parse_failed=truncated)
+    update_generation_limits(settings)
+    return settings.options_for(MODEL)["num_predict"]
+
+
+def test_derive_limits_formula_and_min_samples():
+    obs = pd.DataFrame({
+        "model": ["a"] * 20 + ["b"] * 5,
+        "eval_count": list(range(100, 300, 10)) + [50] * 5,
+        "prompt_tokens": [1000] * 25,
+        "truncated": [False] * 25,
+        "parse_failed": [False] * 25,
+        "num_predict": [400] * 25,
+        "num_ctx": [2048] * 25,
+    })
+
+    limits = derive_limits(obs, min_samples=20)
+
+    assert set(limits) == {"a"}
+    p95 = obs["eval_count"][:20].quantile(0.95)
+    assert limits["a"]["num_predict"] == int(-(-(p95 * 1.25 + 16) // 1))
+    assert limits["a"]["num_ctx"] == 1536  # 1000 + 363 rounded up to 512
+    assert limits["a"]["num_predict_used"] == 400
+
+
+def test_truncation_raises_once_and_does_not_ratchet(settings):
+    # 20% of articles need 300 tokens, the rest 150-230; the start limit is 250
+    lengths = [300] * 8 + [150 + 80 * i // 31 for i in range(32)]
+
+    history = [simulate(settings, lengths) for _ in range(4)]
+
+    # raised by 50% once; afterwards nothing is truncated and the limit settles
+    # on the p95 of real lengths: 300 * 1.25 + 16
+    assert history == [375, 391, 391, 391]
+    obs = load_observations(settings.generation_stats_file)
+    assert not obs[obs["num_predict"] >= 375]["truncated"].any()
+
+
+def test_too_few_calls_at_new_limit_keep_it(settings):
+    lengths = [300] * 8 + [200] * 32
+    assert simulate(settings, lengths) == 375
+    # 5 calls at 375 are below min_samples: keep 375, don't fall back to 250
+    assert simulate(settings, lengths[:5]) == 375
+    assert settings.options_for(MODEL)["num_predict"] == 375
+
+
+def _article(settings, article_id="1"):
+    path = settings.webdata_dir / f"{article_id}.json"
+    write_json(path, {"url": f"https://www.rts.ch/a-{article_id}.html", "body": "text"})
+    return path
+
+
+@pytest.mark.parametrize("reply, parse_failed", [
+    ('{"subject_bias": 0.1, "comment": "ok"}', False),
+    ("no json here", True),
+])
+def test_score_one_article_records_each_call_once(settings, monkeypatch, reply, parse_failed):
+    monkeypatch.setattr(prompting, "call_ollama_full",
+                        lambda *a, **k: {"response": reply, "eval_count": 12, "done_reason": "stop"})
+
+    result = prompting.score_one_article(_article(settings), MODEL, settings)
+
+    obs = load_observations(settings.generation_stats_file)
+    assert len(obs) == 1
+    assert bool(obs["parse_failed"][0]) is parse_failed
+    assert ("_error" in result) is parse_failed
+
+
+def test_score_folder_reads_limits_once(settings, monkeypatch):
+    settings.final_dir.mkdir(parents=True)
+    write_json(settings.generation_limits_file, {MODEL: {"num_predict": 333, "num_ctx": 2048}})
+    for i in range(5):
+        _article(settings, str(i))
+    seen = []
+    monkeypatch.setattr(prompting, "call_ollama_full", lambda model, prompt, s, options: seen.append(options) or
+                        {"response": dumps({"subject_bias": 0.1}).decode(), "done_reason": "stop"})
+    reads = []
+    original = settings_module.read_json
+    monkeypatch.setattr(settings_module, "read_json", lambda p: reads.append(p) or original(p))
+    settings = replace(settings, runs=2, adaptive_min_samples=1000)
+
+    prompting.score_folder(settings)
+
+    assert len(seen) == 5 * 2
+    assert all(o["num_predict"] == 333 for o in seen)
+    assert reads == [settings.generation_limits_file]
+
+
+def test_num_ctx_is_not_lowered_below_configured(settings):
+    # short prompts: p99 prompt + num_predict fits in 1024, but 2048 is configured
+    simulate(settings, [200] * 40)
+    assert settings.options_for(MODEL)["num_ctx"] == 2048
+
+    # an explicit per-model num_ctx still wins
+    explicit = replace(settings, model_options={MODEL: {"num_ctx": 1024}})
+    assert explicit.options_for(MODEL)["num_ctx"] == 1024
+
+
+def test_generate_prompt_size_includes_cached_prefix(settings, monkeypatch):
+    # first call cold (whole prompt evaluated), later calls hit Ollama's prefix cache
+    counts = iter([1000, 40, 40])
+    monkeypatch.setattr(prompting, "call_ollama_full", lambda model, prompt, s, options: {
+        "response": dumps({"subject_bias": 0.1}).decode(), "done_reason": "stop",
+        "eval_count": 50, "prompt_eval_count": next(counts)})
+    for i in range(3):
+        prompting.score_one_article(_article(settings, str(i)), MODEL, settings)
+
+    obs = load_observations(settings.generation_stats_file)
+    assert list(obs["prompt_eval_count"]) == [1000, 40, 40]
+    # same-sized prompts: the hot calls are logged at the cold size, not 40
+    assert list(obs["prompt_tokens"]) == [1000, 1000, 1000]
+
+
+def test_session_prompt_size_includes_cached_prefix(settings, monkeypatch):
+    settings = replace(settings, prompt_cache=True)
+    settings.final_dir.mkdir(parents=True)
+    write_json(settings.prompt_prefix_file, {MODEL: {"system_sha1": "stale", "prefix_tokens": 1}})
+    monkeypatch.setattr(prompting.PromptSession, "_unload", lambda self: None)
+    replies = iter([{"prompt_eval_count": 900}, {"prompt_eval_count": 30}])
+
+    def chat(self, user, options):
+        return {**next(replies), "message": {"content": "{}"}, "done_reason": "stop", "eval_count": 50}
+
+    monkeypatch.setattr(prompting.PromptSession, "_chat", chat)
+    session = prompting.PromptSession(MODEL, settings)
+    prompting.score_one_article(_article(settings), MODEL, settings, session=session)
+
+    obs = load_observations(settings.generation_stats_file)
+    # measured cold prefix (900) + the article's evaluated tokens (30)
+    assert session.prefix_tokens == 900
+    assert obs["prompt_tokens"][0] == 930 and obs["prompt_eval_count"][0] == 30
+
+
+def test_context_overflow_is_logged(settings):
+    response = {"eval_count": 300, "prompt_eval_count": 1900, "done_reason": "stop"}
+    record_generation(settings, MODEL, response, {"num_ctx": 2048}, parse_failed=False)
+    record_generation(settings, MODEL, response, {"num_ctx": 4096}, parse_failed=False)
+    assert list(load_observations(settings.generation_stats_file)["ctx_exceeded"]) == [True, False]
@@ -0,0 +1,115 @@
+import pytest
+
+from html_parse import read_input_urls, save_data
+from ingest_index import IngestIndex, content_hash, normalize_url
+
+URL_A = "https://www.rts.ch/info/suisse/2026/article/premier-article-29000001.html"
+URL_B = "https://www.rts.ch/info/monde/2026/article/second-article-29000002.html"
+
+
+def article(url, body, canonical=None):
+    return {"url": url, "canonical_url": canonical or url, "title": "t", "body": body}
+
+
+@pytest.fixture
+def index(tmp_path):
+    return IngestIndex.load(tmp_path / "ingest_index.json")
+
+
+@pytest.mark.parametrize("raw, expected", [
+    (URL_A, URL_A),
+    ("  HTTP://WWW.RTS.CH/info/a-1.html#comments ", "https://www.rts.ch/info/a-1.html"),
+    ("https://www.rts.ch:443/info/a-1.html/", "https://www.rts.ch/info/a-1.html"),
+    ("https://www.rts.ch/a?utm_source=x&b=2&fbclid=y&a=1", "https://www.rts.ch/a?a=1&b=2"),
+    ("url", None),
+    ("ftp://example.org/file", None),
+])
+def test_normalize_url(raw, expected):
+    assert normalize_url(raw) == expected
+
+
+def test_read_input_urls_skips_header_and_dedupes(tmp_path):
+    csv = tmp_path / "links.csv"
+    csv.write_text(f"url\n{URL_A}\n{URL_B}\n\n{URL_A}#top\n{URL_A.upper().replace('HTTPS', 'https')}\nnot a url\n")
+    urls = read_input_urls(csv)
+    assert urls[:2] == [URL_A, URL_B]
+    assert len(urls) == 3  # the upper-cased path is a different url
+
+
+def test_read_input_urls_keeps_the_link_as_given(tmp_path):
+    csv = tmp_path / "links.csv"
+    given = "http://www.rts.ch/info/a-1.html/?b=2&a=1"
+    csv.write_text(f"url\n  {given}  \nhttps://www.rts.ch/info/a-1.html?a=1&b=2\n")
+    # the second line normalizes to the same key: deduped, first occurrence fetched as written
+    assert read_input_urls(csv) == [given]
+
+
+def test_content_hash_ignores_whitespace():
+    assert content_hash("a  b\n\nc") == content_hash("a b c")
+    assert content_hash("") is None
+
+
+def test_id_collision_gets_suffix(index, tmp_path):
+    # both canonical urls end in the same RTS id -> same make_filename
+    a = article(URL_A, "body a")
+    b = article(URL_B, "body b", canonical="https://www.rts.ch/autre/page-29000001.html")
+    save_data([a, b], tmp_path, index=index)
+
+    files = sorted(p.name for p in tmp_path.glob("29000001*.json"))
+    assert len(files) == 2
+    assert index.urls[URL_A] == "29000001"
+    assert index.urls[URL_B].startswith("29000001_")
+
+
+def test_known_url_not_refetched(index, tmp_path):
+    save_data([article(URL_A, "body")], tmp_path, index=index)
+    assert not index.needs_fetch(URL_A + "#x")
+    assert index.needs_fetch(URL_A, refetch=True)
+    assert index.needs_fetch(URL_B)
+
+
+def test_unchanged_body_is_not_rewritten_or_rescored(index, tmp_path):
+    save_data([article(URL_A, "body")], tmp_path, index=index)
+    index.mark_scored("29000001", "m", 1)
+    path = tmp_path / "29000001.json"
+    path.write_text("sentinel")
+
+    save_data([article(URL_A, "body ")], tmp_path, index=index)
+    assert path.read_text() == "sentinel"
+    assert not index.needs_scoring("29000001", "m", 1, output_exists=True)
+
+
+def test_changed_body_is_rescored(index, tmp_path):
+    save_data([article(URL_A, "body")], tmp_path, index=index)
+    index.mark_scored("29000001", "m", 1)
+
+    save_data([article(URL_A, "corrected body")], tmp_path, index=index)
+    assert "corrected body" in (tmp_path / "29000001.json").read_text()
+    assert index.needs_scoring("29000001", "m", 1, output_exists=True)
+    assert index.needs_scoring("29000001", "m", 2, output_exists=False)
+
+
+def test_first_use_keeps_existing_outputs(index, tmp_path):
+    # outputs on disk from before the index existed: no rescoring, hash backfilled
+    save_data([article(URL_A, "body")], tmp_path, index=index)
+    assert not index.needs_scoring("29000001", "m", 1, output_exists=True)
+    assert index.articles["29000001"]["scored"]["m|1"] == content_hash("body")
+
+    # ... and a later edit is still detected
+    save_data([article(URL_A, "new body")], tmp_path, index=index)
+    assert index.needs_scoring("29000001", "m", 1, output_exists=True)
+
+
+def test_legacy_article_uses_file_exists_rule(index):
+    assert not index.needs_scoring("unknown", "m", 1, output_exists=True)
+    assert index.needs_scoring("unknown", "m", 1, output_exists=False)
+
+
+def test_save_and_load_round_trip(index, tmp_path):
+    save_data([article(URL_A, "body")], tmp_path, index=index)
+    index.mark_scored("29000001", "m", 1)
+    index.save()
+
+    again = IngestIndex.load(index.path)
+    assert again.urls == index.urls
+    assert again.articles == index.articles
@@ -0,0 +1,36 @@
+from dataclasses import replace
+
+import html_parse
+import profiling
+from settings import Settings
+from test.conftest import ROOT
+
+FIXTURE = ROOT / "app" / "input_files" / "fixtures" / "rts_article.html"
+
+
+def test_parse_workers_profile_is_merged(tmp_path, monkeypatch):
+    html = FIXTURE.read_bytes()
+    monkeypatch.setattr(html_parse, "fetch_rts_html", lambda url: html)
+    links = tmp_path / "links.csv"
+    links.write_text("url\n" + "\n".join(f"https://www.rts.ch/a-{i}.html" for i in range(6)))
+
+    settings = replace(Settings(profile=True, profile_top=5), root=ROOT)
+    monkeypatch.setattr(profiling, "profile_dir", lambda s: tmp_path / "profiles")
+    out = profiling.profile_dir(settings)
+    out.mkdir()
+
+    with profiling.profile_stage("extract_htmls", settings):
+        articles = html_parse.process_input_data(links, parse_workers=2, profile_to=out)
+    profiling.merge_worker_profiles("parse_html", settings)
+
+    assert len(articles) == 6
+    assert {p.name for p in out.iterdir()} == {"extract_htmls.prof", "parse_html.prof", "summary.txt"}
+    summary = (out / "summary.txt").read_text()
+    assert "parse_rts_html" in summary and "========== extract_htmls ==========" in summary
+
+
+def test_profile_stage_is_noop_when_disabled(tmp_path):
+    settings = replace(Settings(), root=ROOT)
+    with profiling.profile_stage("nothing", settings):
+        pass
+    assert not (settings.final_dir / "profiles" / profiling._RUN_STAMP).exists()
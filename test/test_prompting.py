@@ -0,0 +1,102 @@
+import pytest
+
+from prompting import PromptSession, save_prompt_cache_stats
+from serialization import read_json
+
+MODEL = "gemma2:latest"
+PREFIX = 120
+
+
+class FakeOllama:
+    """Chat endpoint whose prefix cache is hot unless the model was just unloaded."""
+
+    def __init__(self, hot_count=1, cold_count=PREFIX):
+        self.hot_count = hot_count  # None: prompt_eval_count omitted, as for a fully cached prompt
+        self.cold_count = cold_count
+        self.loaded = True
+        self.unloads = 0
+        self.chats = []
+
+    def unload(self, session):
+        self.unloads += 1
+        self.loaded = False
+
+    def chat(self, session, user, options):
+        self.chats.append(user)
+        # same chars-per-token ratio the session derives from the prefix
+        article = round(len(user) * PREFIX / len(session.system))
+        base = self.hot_count if self.loaded else self.cold_count
+        self.loaded = True
+        count = None if base is None else base + article
+        reply = {"message": {"content": "{}"}, "done_reason": "stop", "eval_count": 5}
+        if count is not None:
+            reply["prompt_eval_count"] = count
+        return reply
+
+
+@pytest.fixture
+def ollama(monkeypatch):
+    fake = FakeOllama()
+    monkeypatch.setattr(PromptSession, "_unload", lambda self: fake.unload(self))
+    monkeypatch.setattr(PromptSession, "_chat", lambda self, user, options: fake.chat(self, user, options))
+    return fake
+
+
+def test_prefix_is_measured_cold_once_and_persisted(project_settings, ollama):
+    settings = project_settings(models=[MODEL])
+    session = PromptSession(MODEL, settings)
+    for text in ("premier article", "second article"):
+        session.generate(text)
+
+    # one unload + one cold warm-up, then only the two articles
+    assert ollama.unloads == 1
+    assert ollama.chats[0] == "" and len(ollama.chats) == 3
+    assert session.prefix_tokens == PREFIX
+    assert read_json(settings.prompt_prefix_file)[MODEL]["prefix_tokens"] == PREFIX
+    assert session.stats["calls"] == 2
+    # a hot call still evaluates one token of the prefix
+    assert session.stats["prompt_eval_saved"] == 2 * (PREFIX - 1)
+
+
+@pytest.mark.parametrize("hot_count", [1, None])
+def test_hot_cache_reuses_persisted_count(project_settings, ollama, hot_count):
+    settings = project_settings(models=[MODEL])
+    PromptSession(MODEL, settings).warm()
+    ollama.hot_count = hot_count
+    ollama.chats.clear()
+
+    # a later batch (or a second streaming worker): the cache is hot, nothing is re-measured
+    session = PromptSession(MODEL, settings)
+    for i in range(3):
+        session.generate(f"article {i}")
+
+    assert ollama.unloads == 1
+    assert len(ollama.chats) == 3 and "" not in ollama.chats
+    assert session.prefix_tokens == PREFIX
+    assert session.stats["prompt_eval_saved"] == 3 * (PREFIX - (hot_count or 0))
+
+
+def test_missing_count_does_not_rewarm_every_call(project_settings, ollama):
+    ollama.cold_count = None  # server never reports prompt_eval_count
+    settings = project_settings(models=[MODEL])
+    session = PromptSession(MODEL, settings)
+    for i in range(3):
+        session.generate(f"article {i}")
+
+    assert ollama.unloads == 1
+    assert ollama.chats.count("") == 1 and len(ollama.chats) == 4
+    assert session.prefix_tokens == 0
+    assert not settings.prompt_prefix_file.exists()  # nothing trustworthy to persist
+
+
+def test_prompt_cache_stats_accumulate_across_batches(project_settings):
+    settings = project_settings(models=[MODEL])
+    save_prompt_cache_stats({"calls": 3, "prompt_eval_tokens": 90, "prompt_eval_saved": 300}, MODEL, 1, settings)
+    save_prompt_cache_stats({"calls": 2, "prompt_eval_tokens": 60, "prompt_eval_saved": 200}, MODEL, 1, settings)
+    save_prompt_cache_stats({"calls": 1, "prompt_eval_tokens": 30, "prompt_eval_saved": 100}, MODEL, 2, settings)
+
+    stats = read_json(settings.final_dir / "gemma2_latest" / "prompt_cache_stats.json")
+    assert stats == {
+        "1": {"calls": 5, "prompt_eval_tokens": 150, "prompt_eval_saved": 500},
+        "2": {"calls": 1, "prompt_eval_tokens": 30, "prompt_eval_saved": 100},
+    }
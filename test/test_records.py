@@ -0,0 +1,100 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from post_processing import calculate_overall_bias
+from records import SCORE_FIELDS, ScoreBatch, ScoreRecord
+
+
+def make_record(i, model="llama3.2:latest", comment="Neutre."):
+    return ScoreRecord.from_model_output(
+        {"subject_bias": 0.1, "framing_bias": -0.2, "treatment_bias": 0.0,
+         "guests_bias": -0.1, "confidence": 0.8, "comment": comment},
+        model=model, article_id=str(1000 + i % 7), run=1 + i % 3,
+    )
+
+
+def test_from_model_output_tolerates_bad_values():
+    rec = ScoreRecord.from_model_output(
+        {"subject_bias": "0.3", "framing_bias": "n/a", "treatment_bias": True, "_error": "json_parse_failed"},
+        model="m", article_id=42, run=2,
+    )
+    assert rec.subject_bias == pytest.approx(0.3)
+    assert math.isnan(rec.framing_bias) and math.isnan(rec.treatment_bias) and math.isnan(rec.guests_bias)
+    assert rec.article_id == "42" and rec.comment is None
+
+
+def test_append_grows_and_round_trips():
+    batch = ScoreBatch(capacity=2)
+    records = [make_record(i, model=f"m{i % 2}", comment=None if i == 3 else f"c{i % 4}") for i in range(25)]
+    batch.extend(records)
+
+    assert len(batch) == 25
+    assert len(batch._cols["run"]) >= 25
+    for original, restored in zip(records, batch):
+        assert restored.model == original.model
+        assert restored.article_id == original.article_id
+        assert restored.run == original.run
+        assert restored.comment == original.comment
+        for f in SCORE_FIELDS:
+            assert getattr(restored, f) == pytest.approx(getattr(original, f), abs=1e-7)
+
+
+def test_strings_are_interned():
+    batch = ScoreBatch()
+    batch.extend(make_record(i) for i in range(100))
+    assert batch._models.values == ["llama3.2:latest"]
+    assert batch._comments.values == ["Neutre."]
+    assert len(batch._articles.values) == 7
+
+
+def test_to_frame_dtypes_and_zero_copy():
+    batch = ScoreBatch()
+    batch.extend(make_record(i) for i in range(10))
+    df = batch.to_frame()
+
+    assert list(df.columns) == ["model", "article_id", *SCORE_FIELDS, "comment", "run"]
+    for c in ("model", "article_id", "comment"):
+        assert isinstance(df[c].dtype, pd.CategoricalDtype)
+    for f in SCORE_FIELDS:
+        assert df[f].dtype == np.float32
+        assert np.shares_memory(df[f].to_numpy(), batch._cols[f])
+    assert df["run"].dtype == np.int16
+
+
+def test_exported_views_are_read_only():
+    batch = ScoreBatch()
+    batch.extend(make_record(i) for i in range(3))
+    df = batch.to_frame()
+
+    with pytest.raises(ValueError, match="read-only"):
+        df.loc[0, "subject_bias"] = 5.0
+    assert batch._cols["subject_bias"][0] == np.float32(0.1)
+    # the batch itself keeps appending into its (writable) buffers
+    batch.append(make_record(3))
+    assert len(batch) == 4 and batch.record(3).subject_bias == pytest.approx(0.1)
+    # categorical codes are narrowed by pandas, hence copied
+    assert not np.shares_memory(df["model"].cat.codes.to_numpy(), batch._cols["model"])
+
+
+def test_to_arrow_dictionary_columns():
+    pa = pytest.importorskip("pyarrow")
+    batch = ScoreBatch()
+    batch.extend(make_record(i, comment=None if i == 0 else "x") for i in range(5))
+    table = batch.to_arrow()
+
+    assert pa.types.is_dictionary(table.schema.field("model").type)
+    assert table.schema.field("subject_bias").type == pa.float32()
+    assert table.column("comment").null_count == 1
+    assert table.column("model").to_pylist() == ["llama3.2:latest"] * 5
+
+
+def test_overall_bias_has_no_float32_noise():
+    batch = ScoreBatch()
+    batch.append(make_record(0))
+    df = calculate_overall_bias(batch.to_frame())
+    assert df["overall_bias"].dtype == np.float64
+    assert df["overall_bias"].iloc[0] == -0.05
+    assert df.to_csv(index=False).splitlines()[1].endswith(",-0.05")
@@ -0,0 +1,136 @@
+import itertools
+from dataclasses import replace
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+import prompting
+import scheduler
+from ingest_index import IngestIndex
+from scheduler import plan_tasks, run_tasks
+from serialization import dumps, read_json, write_json
+
+MODELS = ["llama3.2:latest", "gemma2:latest", "phi3:mini"]
+
+
+def _write_article(settings, article_id, published):
+    write_json(settings.webdata_dir / f"{article_id}.json",
+               {"url": f"https://www.rts.ch/a-{article_id}.html", "body": f"body {article_id}",
+                "date_published": published})
+
+
+@pytest.fixture
+def settings(project_settings):
+    settings = project_settings(models=MODELS, runs=2)
+    # 8 articles over 4 days, one undated; all older than the freshness window
+    for i in range(8):
+        _write_article(settings, 100 + i, f"2026-03-{10 + i // 2:02d} {8 + i}:00:00" if i else None)
+    return settings
+
+
+def _switches(tasks):
+    return sum(a.model != b.model for a, b in zip(tasks, tasks[1:]))
+
+
+def test_plan_batches_by_model_within_a_tier(settings):
+    tasks = plan_tasks(settings, IngestIndex.load(settings.index_file))
+
+    assert len(tasks) == 8 * 3 * 2
+    assert [t.run for t in tasks] == sorted(t.run for t in tasks)
+    # one model switch between models inside each run, one at the run boundary
+    assert _switches(tasks) == 2 * (len(MODELS) - 1) + 1
+    for (run, model), group in itertools.groupby(tasks, key=lambda t: (t.run, t.model)):
+        ids = [t.article_path.stem for t in group]
+        # newest first, undated last
+        assert ids == [str(100 + i) for i in range(7, 0, -1)] + ["100"]
+    assert [t.model for t in tasks[:8]] == [MODELS[0]] * 8
+
+
+def test_plan_flagged_first_and_skips_scored(settings):
+    settings.priority_file.write_text("# flagged\n102\nhttps://www.rts.ch/a-105.html\n")
+    index = IngestIndex.load(settings.index_file)
+    index.urls["https://www.rts.ch/a-105.html"] = "105"
+    out = settings.final_dir / "phi3_mini" / "1" / "103.json"
+    out.parent.mkdir(parents=True)
+    out.write_text("{}")
+
+    tasks = plan_tasks(settings, index)
+
+    flagged = tasks[:2 * 3 * 2]
+    assert {t.article_path.stem for t in flagged} == {"102", "105"}
+    assert _switches(flagged) == 2 * (len(MODELS) - 1) + 1
+    assert len(tasks) == 8 * 3 * 2 - 1
+    assert not any(t.model == "phi3:mini" and t.run == 1 and t.article_path.stem == "103" for t in tasks)
+
+
+def test_fresh_article_reaches_every_model_before_backfill(settings):
+    # a large backfill of old articles plus one published an hour ago
+    for i in range(200):
+        _write_article(settings, 1000 + i, f"2025-{1 + i % 12:02d}-{1 + i % 28:02d} 12:00:00")
+    now = datetime(2026, 10, 19, 12, tzinfo=timezone.utc).timestamp()
+    _write_article(settings, 9999, "2026-10-19 11:00:00")
+
+    tasks = plan_tasks(settings, IngestIndex.load(settings.index_file), now=now)
+
+    fresh = [t for t in tasks[:len(MODELS) * 2] if t.article_path.stem == "9999"]
+    assert len(fresh) == len(MODELS) * 2  # every model and run, before anything else
+    assert [(t.run, t.model) for t in fresh] == [(r, m) for r in (1, 2) for m in MODELS]
+    # the backfill is still batched by model after it
+    assert _switches(tasks[len(fresh):]) == 2 * (len(MODELS) - 1) + 1
+
+    # outside the window the same article is just the newest backfill item
+    later = plan_tasks(settings, IngestIndex.load(settings.index_file), now=now + 2 * 86400)
+    assert [t.article_path.stem for t in later[:2]] == ["9999", "107"]
+    assert later[1].model == MODELS[0]
+
+
+def test_run_tasks_stops_at_budget_and_writes_checkpoint(settings, monkeypatch):
+    tasks = plan_tasks(settings, IngestIndex.load(settings.index_file))
+    clock = SimpleNamespace(now=0.0)
+    monkeypatch.setattr(scheduler, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    done = []
+
+    def score(task):
+        clock.now += 10.0
+        done.append(task)
+
+    # 10s per task: the 4th would end at 40s > 35s, so it is not started
+    remaining = run_tasks(tasks, score, budget_s=35, checkpoint_file=settings.checkpoint_file)
+
+    assert done == tasks[:3]
+    assert remaining == tasks[3:]
+    checkpoint = read_json(settings.checkpoint_file)
+    assert checkpoint["done"] == 3 and checkpoint["budget_s"] == 35
+    assert checkpoint["remaining"] == [
+        {"model": t.model, "run": t.run, "article_id": t.article_path.stem} for t in tasks[3:]
+    ]
+
+    # finishing the rest clears the checkpoint
+    assert run_tasks(remaining, score, checkpoint_file=settings.checkpoint_file) == []
+    assert not settings.checkpoint_file.exists()
+
+
+def test_score_folder_saves_index_periodically(settings, monkeypatch):
+    reply = {"response": dumps({"subject_bias": 0.1, "comment": "ok"}).decode(), "done_reason": "stop"}
+    monkeypatch.setattr(prompting, "call_ollama_full", lambda *a, **k: reply)
+    index = IngestIndex.load(settings.index_file)
+    for p in settings.webdata_dir.glob("*.json"):
+        data = read_json(p)
+        index.record_article(data["url"], p.stem, data["body"])
+    index.save()
+    saves = []
+    original_save = IngestIndex.save
+
+    def counting_save(self):
+        saves.append(sum(len(a["scored"]) for a in self.articles.values()))
+        original_save(self)
+
+    monkeypatch.setattr(IngestIndex, "save", counting_save)
+    settings = replace(settings, models=MODELS[:1], runs=1, index_save_every=3)
+
+    prompting.score_folder(settings)
+
+    # every 3 tasks, then once more at the end
+    assert saves == [3, 6, 8]
+    assert len(list((settings.final_dir / "llama3.2_latest" / "1").glob("*.json"))) == 8
@@ -0,0 +1,97 @@
+import json
+import math
+import sys
+
+import pandas as pd
+import pytest
+from bs4 import NavigableString
+
+import serialization
+from html_parse import RTSArticle
+from post_processing import prepare_raw_frame, prepare_results_frame
+from records import ModelScores
+from serialization import DecodeError, available_backends, dumps, loads, loads_as, write_json
+
+BACKENDS = list(available_backends().values())
+DOC = {"title": "Élection à Genève", "keywords": ["politique", "vote"], "score": -0.25, "n": 3, "none": None}
+
+
+def test_backend_fallback_order(monkeypatch):
+    installed = [name for name in ("orjson", "msgspec") if name in available_backends()]
+    assert list(available_backends()) == installed + ["json"]
+
+    monkeypatch.setitem(sys.modules, "orjson", None)  # import orjson -> ImportError
+    assert list(available_backends())[0] == ("msgspec" if "msgspec" in installed else "json")
+    monkeypatch.setitem(sys.modules, "msgspec", None)
+    assert list(available_backends()) == ["json"]
+
+
+@pytest.mark.parametrize("backend", BACKENDS, ids=lambda b: b.name)
+def test_compact_and_pretty_output(backend):
+    compact = backend.dumps(DOC, False)
+    pretty = backend.dumps(DOC, True)
+
+    assert isinstance(compact, bytes) and b"\n" not in compact and b", " not in compact
+    assert b'\n  "title": ' in pretty
+    assert "Élection".encode("utf-8") in compact  # UTF-8, not \\u escapes
+    assert backend.loads(compact) == backend.loads(pretty) == DOC == json.loads(compact)
+
+
+@pytest.mark.parametrize("backend", BACKENDS, ids=lambda b: b.name)
+def test_decode_error_for_each_backend(backend):
+    for bad in (b"{bad", b'{"a": 1', b""):
+        with pytest.raises(DecodeError):
+            backend.loads(bad)
+
+
+def test_str_subclasses_are_accepted():
+    # bs4 hands out NavigableString for <script type="application/ld+json"> contents
+    raw = NavigableString('{"@type": "NewsArticle", "headline": "Titre"}')
+    assert loads(raw) == {"@type": "NewsArticle", "headline": "Titre"}
+    assert loads_as(raw, ModelScores) == ModelScores()
+
+
+@pytest.mark.parametrize("backend", BACKENDS, ids=lambda b: b.name)
+def test_loads_as_ignores_unknown_keys(backend):
+    raw = dumps({"subject_bias": 0.1, "comment": "ok", "_error": None, "raw_model_output": "x"})
+    assert backend.loads_as(raw, ModelScores) == ModelScores(subject_bias=0.1, comment="ok")
+
+
+def test_loads_as_validates_with_msgspec():
+    pytest.importorskip("msgspec")
+    assert serialization.TYPED_BACKEND.name == "msgspec"
+    with pytest.raises(DecodeError):
+        loads_as(b'{"subject_bias": "0.3"}', ModelScores)
+    with pytest.raises(DecodeError):
+        loads_as(b'{"title": "t"}', RTSArticle)  # required fields missing
+
+
+def test_results_frame_decodes_typed_and_coerces_off_schema(project_settings):
+    settings = project_settings(models=["phi3:mini"], runs=1)
+    out = settings.final_dir / "phi3_mini" / "1"
+    out.mkdir(parents=True)
+    write_json(out / "1.json", {"subject_bias": 0.1, "framing_bias": 0, "treatment_bias": -0.2,
+                                "guests_bias": 0.3, "confidence": 0.9, "comment": "ok"})
+    write_json(out / "2.json", {"subject_bias": "0.3", "framing_bias": True, "comment": "strings"})
+    write_json(out / "3.json", {"_error": "json_parse_failed", "raw_model_output": "???"})
+
+    df = prepare_results_frame(settings).set_index("article_id")
+
+    assert df.loc["1", "subject_bias"] == pytest.approx(0.1) and df.loc["1", "comment"] == "ok"
+    assert df.loc["2", "subject_bias"] == pytest.approx(0.3) and math.isnan(df.loc["2", "framing_bias"])
+    assert math.isnan(df.loc["3", "subject_bias"]) and pd.isna(df.loc["3", "comment"])
+
+
+def test_raw_frame_reads_articles_typed(project_settings, capsys):
+    settings = project_settings()
+    article = {f: None for f in RTSArticle.__dataclass_fields__}
+    article.update(title="Titre", body="Corps", keywords=["a"], sources=[], credit=[],
+                   date_accessed="2026-03-10 08:00:00", url="https://www.rts.ch/a-1.html")
+    write_json(settings.webdata_dir / "1.json", article)
+    write_json(settings.webdata_dir / "2.json", {"title": "incomplete"})
+
+    df = prepare_raw_frame(settings.webdata_dir)
+
+    assert list(df["article_id"]) == ["1"]
+    assert df.loc[0, "title"] == "Titre" and df.loc[0, "keywords"] == ["a"]
+    assert "Error reading" in capsys.readouterr().out
@@ -0,0 +1,114 @@
+import threading
+import time
+
+import pytest
+
+import prompting
+import streaming
+from ingest_index import IngestIndex
+from serialization import dumps, read_json
+from test.conftest import ROOT
+
+FIXTURE = ROOT / "app" / "input_files" / "fixtures" / "rts_article.html"
+STAGES = ("fetch-", "parse-", "save-", "plan-", "score-", "feed")
+
+SCORES = {"subject_bias": 0.1, "framing_bias": -0.2, "treatment_bias": 0.0,
+          "guests_bias": 0.3, "confidence": 0.9, "comment": "ok"}
+
+
+@pytest.fixture
+def fetched(monkeypatch):
+    html = FIXTURE.read_bytes()
+    fetched = []
+
+    def fake_fetch(url):
+        fetched.append(url)
+        return html
+
+    def fake_chat(self, user, options):
+        # warm-up (empty user) evaluates the prefix, later calls only the article
+        return {"message": {"content": dumps(SCORES).decode()}, "done_reason": "stop",
+                "prompt_eval_count": 100 if not user else 40, "eval_count": 30}
+
+    monkeypatch.setattr(streaming, "fetch_rts_html", fake_fetch)
+    monkeypatch.setattr(prompting.PromptSession, "_chat", fake_chat)
+    monkeypatch.setattr(prompting.PromptSession, "_unload", lambda self: None)
+    return fetched
+
+
+def _urls(n):
+    return [f"https://www.rts.ch/info/article-{i}.html" for i in range(n)]
+
+
+def _stage_threads():
+    return [t for t in threading.enumerate() if t.name.startswith(STAGES)]
+
+
+def _wait_for_shutdown(timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while _stage_threads() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return _stage_threads()
+
+
+def test_stage_chain_scores_every_article(project_settings, fetched):
+    settings = project_settings(models=["m:a", "m:b"], runs=2, prompt_cache=True,
+                                fetch_workers=2, parse_workers=2, stream_queue_size=4)
+
+    records = list(streaming.stream_pipeline(settings, _urls(3)))
+
+    assert len(fetched) == 3
+    assert len(records) == 3 * 2 * 2
+    assert {(r.model, r.run) for r in records} == {(m, r) for m in ("m:a", "m:b") for r in (1, 2)}
+    assert all(r.subject_bias == pytest.approx(0.1) and r.comment == "ok" for r in records)
+    assert len(list(settings.webdata_dir.glob("*.json"))) == 3
+    assert len(list((settings.final_dir / "m_a" / "2").glob("*.json"))) == 3
+    assert not _wait_for_shutdown()
+
+    # prompt cache stats are written per model and run, like score_folder does
+    stats = read_json(settings.final_dir / "m_b" / "prompt_cache_stats.json")
+    assert set(stats) == {"1", "2"}
+    assert sum(s["calls"] for s in stats.values()) == 3 * 2
+    assert all(s["prompt_eval_tokens"] == s["calls"] * 40 for s in stats.values())
+
+    # second pass: urls are in the index and every output exists
+    assert list(streaming.stream_pipeline(settings, _urls(3))) == []
+    assert len(fetched) == 3
+
+
+def test_backpressure_and_early_stop(project_settings, fetched, monkeypatch):
+    settings = project_settings(models=["m:a"], runs=1, fetch_workers=1, parse_workers=1, stream_queue_size=1)
+    reply = {"response": dumps(SCORES).decode(), "done_reason": "stop", "eval_count": 30}
+    monkeypatch.setattr(prompting, "call_ollama_full", lambda *a, **k: reply)
+
+    stream = streaming.stream_pipeline(settings, _urls(50))
+    first = next(stream)
+    time.sleep(1.0)  # let every stage fill its queue
+    # bounded queues: only a handful of urls can be in flight behind the consumer
+    assert len(fetched) < 20
+    stream.close()
+
+    assert first.comment == "ok"
+    assert not _wait_for_shutdown()
+    assert len(fetched) < 20
+    # what was scored before the stop is recorded, so a rerun does not redo it
+    index = read_json(settings.index_file)
+    assert sum(bool(a["scored"]) for a in index["articles"].values()) >= 1
+
+
+def test_index_saved_every_index_save_every_results(project_settings, fetched, monkeypatch):
+    settings = project_settings(models=["m:a", "m:b"], runs=1, prompt_cache=True, parse_workers=1,
+                                stream_queue_size=16, index_save_every=2)
+    saves = []
+    original_save = IngestIndex.save
+
+    def counting_save(self):
+        saves.append(sum(len(a["scored"]) for a in self.articles.values()))
+        original_save(self)
+
+    monkeypatch.setattr(IngestIndex, "save", counting_save)
+
+    assert len(list(streaming.stream_pipeline(settings, _urls(3)))) == 6
+
+    # every 2 results, not every stream_queue_size, then once more at shutdown
+    assert saves == [2, 4, 6, 6]